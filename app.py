@@ -1,14 +1,23 @@
+import io
 import os
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 from sleep_analyzer import SleepAnalyzer
-from datetime import datetime, timedelta
+from pipeline import enrich_dataset, get_recommendations
+from charts import DEFAULT_POINT_BUDGETS, create_visualizations
+from dataset_cache import DatasetCache
+from sleep_data import load_sleep_csv
+from caching import LRUCache, dataframe_fingerprint
+from sleep_cube import build_cube
+from sleep_log import SleepLog
+from sleep_store import SleepStore
+from synthetic import generate_cohort
+from datetime import datetime
 from dotenv import load_dotenv
 
 import traceback
-from style import load_css
+from style import load_css, render_html, section_card
 
 load_dotenv()
 
@@ -30,182 +39,72 @@ def handle_error(func):
             return None
     return wrapper
 
-@handle_error
-def create_visualizations(df):
-    # Enhanced color scheme for better visual appeal
-    plot_bgcolor = "rgba(15, 28, 46, 0.8)"
-    paper_bgcolor = "rgba(30, 42, 58, 0.9)"
-    font_color = "#FFFFFF"
-    
-    # Enhanced color palette
-    color_palette = ["#4B9CD3", "#60A5FA", "#93C5FD", "#DBEAFE", "#EFF6FF"]
-    color_palette_2 = ["#4B9CD3", "#F59E0B", "#10B981", "#EF4444", "#8B5CF6"]
-
-    # Overview Tab
-    fig_overview = px.box(df, x='University_Year', y='Sleep_Duration', color='Gender',
-                          title="Sleep Duration Distribution by University Year", 
-                          notched=True,
-                          color_discrete_sequence=color_palette_2)
-    fig_overview.update_layout(
-        plot_bgcolor=plot_bgcolor, 
-        paper_bgcolor=paper_bgcolor, 
-        font_color=font_color,
-        title_font_size=18,
-        title_font_color="#4B9CD3",
-        showlegend=True,
-        legend=dict(bgcolor="rgba(30, 42, 58, 0.8)", bordercolor="rgba(75, 156, 211, 0.3)"),
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
-    
-    # Impact Analysis Tab
-    fig_impact = px.scatter(df, x='Study_Hours', y='Sleep_Quality', size='Sleep_Duration',
-                            color='University_Year', title="Study Hours vs Sleep Quality Impact",
-                            hover_name='Gender', size_max=60,
-                            color_discrete_sequence=color_palette_2)
-    fig_impact.update_layout(
-        plot_bgcolor=plot_bgcolor, 
-        paper_bgcolor=paper_bgcolor, 
-        font_color=font_color,
-        title_font_size=18,
-        title_font_color="#4B9CD3",
-        showlegend=True,
-        legend=dict(bgcolor="rgba(30, 42, 58, 0.8)", bordercolor="rgba(75, 156, 211, 0.3)"),
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
+@st.cache_resource
+def get_dataset_cache():
+    return DatasetCache()
 
-    # Sleep Cycles Tab
-    total_stages = df[['Awake', 'Light', 'Deep', 'REM']].sum()
-    sleep_stages_data = {
-        'stage': total_stages.index,
-        'value': total_stages.values
-    }
-    fig_sunburst = px.sunburst(sleep_stages_data,
-                               names='stage',
-                               parents=['Sleep Stages'] * 4,
-                               values='value',
-                               title='Sleep Cycle Distribution Analysis',
-                               color='stage',
-                               color_discrete_map={
-                                   'Awake': '#F59E0B', 'Light': '#60A5FA',
-                                   'Deep': '#10B981', 'REM': '#8B5CF6'
-                               })
-    fig_sunburst.update_layout(
-        plot_bgcolor=plot_bgcolor,
-        paper_bgcolor=paper_bgcolor,
-        font_color=font_color,
-        title_font_size=18,
-        title_font_color="#4B9CD3",
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
 
-    # 3D Factors
-    fig_3d = px.scatter_3d(df, x='Screen_Time', y='Physical_Activity', z='Sleep_Duration',
-                           color='Caffeine_Intake', size='Sleep_Quality',
-                           title="3D Analysis: Screen Time, Activity & Sleep Duration", 
-                           opacity=0.8,
-                           color_continuous_scale=color_palette)
-    fig_3d.update_layout(
-        plot_bgcolor=plot_bgcolor, 
-        paper_bgcolor=paper_bgcolor, 
-        font_color=font_color,
-        title_font_size=18,
-        title_font_color="#4B9CD3",
-        scene=dict(
-            bgcolor=plot_bgcolor,
-            xaxis=dict(backgroundcolor=plot_bgcolor, gridcolor="rgba(75, 156, 211, 0.2)"),
-            yaxis=dict(backgroundcolor=plot_bgcolor, gridcolor="rgba(75, 156, 211, 0.2)"),
-            zaxis=dict(backgroundcolor=plot_bgcolor, gridcolor="rgba(75, 156, 211, 0.2)")
-        ),
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
+@st.cache_resource
+def get_results_cache():
+    """In-process LRU of analysis results and figures, keyed by dataset fingerprint"""
+    return LRUCache(maxsize=16)
 
-    # Sleep Patterns Over Time
-    if 'Date' not in df.columns:
-        df['Date'] = pd.to_datetime(df['Weekday_Sleep_Start'].apply(lambda x: (datetime.now() - timedelta(days=np.random.randint(0, 365))).strftime('%Y-%m-%d')))
-
-    fig_animated = px.scatter(df, x='Date', y='Sleep_Duration', color='Gender',
-                              size='Sleep_Quality',
-                              title="Sleep Duration Patterns Over Time", 
-                              range_y=[0, 12],
-                              color_discrete_sequence=color_palette_2)
-    fig_animated.update_layout(
-        plot_bgcolor=plot_bgcolor, 
-        paper_bgcolor=paper_bgcolor, 
-        font_color=font_color,
-        title_font_size=18,
-        title_font_color="#4B9CD3",
-        showlegend=True,
-        legend=dict(bgcolor="rgba(30, 42, 58, 0.8)", bordercolor="rgba(75, 156, 211, 0.3)"),
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
 
-    # Trend Analysis
-    df_sorted = df.sort_values('Date')
-    fig_trend = px.line(df_sorted, x='Date', y='Sleep_Duration', 
-                        title='Sleep Duration Trend Analysis', 
-                        markers=True,
-                        color_discrete_sequence=["#4B9CD3"])
-    fig_trend.update_layout(
-        plot_bgcolor=plot_bgcolor, 
-        paper_bgcolor=paper_bgcolor, 
-        font_color=font_color,
-        title_font_size=18,
-        title_font_color="#4B9CD3",
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
+@st.cache_resource
+def get_sleep_store():
+    """Local SQLite store of saved nights, shared by every session"""
+    return SleepStore()
 
-    return {
-        "Overview": fig_overview,
-        "Impact Analysis": fig_impact,
-        "Sleep Cycles": fig_sunburst,
-        "3D Factors": fig_3d,
-        "Sleep Patterns": fig_animated,
-        "Trend Analysis": fig_trend
-    }
+
+def save_to_store(df, replace, container=st):
+    """Save ``df`` to the local store, warning about nights that were already stored"""
+    saved = handle_error(lambda: get_sleep_store().insert(df, replace=replace))()
+    if saved is None:
+        return
+    if saved:
+        container.success(f"✅ Saved {saved:,} nights; reopen them any time from Saved Sleep Log")
+    if len(df) > saved:
+        container.warning(
+            f"{len(df) - saved:,} nights were already saved for the same Student_ID and night and were kept. "
+            "Tick \"Replace saved nights\" to overwrite them."
+        )
 
 
-def get_recommendations(analysis_results):
-    recommendations = []
-    if analysis_results['avg_duration'] < 7:
-        recommendations.append("Consider increasing your sleep duration to at least 7 hours for better health.")
-    if analysis_results['quality_score'] < 6:
-        recommendations.append("Improve sleep quality by creating a restful environment and avoiding caffeine before bed.")
-    if analysis_results['consistency_score'] < 6:
-        recommendations.append("Try to maintain a consistent sleep schedule, even on weekends, to improve your circadian rhythm.")
-    
-    if not recommendations:
-        recommendations.append("Your sleep patterns seem healthy. Keep up the good work!")
-        
-    return recommendations
+def parse_student_ids(text):
+    return [int(part) for part in text.replace(',', ' ').split() if part.isdigit()]
 
 
-def generate_sample_data(n_samples=50):
-    # dates = [datetime.now() - timedelta(days=i) for i in range(n_samples)]
-    start_time = datetime.strptime("22:00", "%H:%M")
-    time_deltas = [timedelta(minutes=int(i)) for i in np.random.normal(0, 30, n_samples)]
-    
-    data = {
-        'Student_ID': np.arange(n_samples),
-        'Age': np.random.randint(18, 26, n_samples),
-        'Gender': np.random.choice(['Male', 'Female'], n_samples),
-        'University_Year': np.random.choice(['1st Year', '2nd Year', '3rd Year'], n_samples),
-        'Sleep_Duration': np.random.normal(7, 1.5, n_samples),
-        'Study_Hours': np.random.normal(5, 2, n_samples),
-        'Screen_Time': np.random.normal(4, 1.5, n_samples),
-        'Caffeine_Intake': np.random.randint(0, 5, n_samples),
-        'Physical_Activity': np.random.normal(45, 20, n_samples),
-        'Sleep_Quality': np.random.randint(4, 10, n_samples),
-        'Weekday_Sleep_Start': [(start_time + delta).strftime("%H:%M") for delta in time_deltas],
-        'Weekend_Sleep_Start': [(start_time + delta + timedelta(hours=1)).strftime("%H:%M") for delta in time_deltas],
-        'Weekday_Sleep_End': [(start_time + delta + timedelta(hours=np.random.normal(7, 1))).strftime("%H:%M") for delta in time_deltas],
-        'Weekend_Sleep_End': [(start_time + delta + timedelta(hours=np.random.normal(8, 1.5))).strftime("%H:%M") for delta in time_deltas]
-    }
-    return pd.DataFrame(data)
+def get_sleep_log():
+    """Nights entered on this session's manual entry form"""
+    if 'sleep_log' not in st.session_state:
+        st.session_state['sleep_log'] = SleepLog()
+    return st.session_state['sleep_log']
+
+
+def load_uploaded_csv(uploaded_file):
+    """Parse and enrich an uploaded CSV, reusing the columnar cache across reruns"""
+    data = uploaded_file.getvalue()
+    # Hash each upload once per session; reruns reuse the key
+    upload_keys = st.session_state.setdefault('upload_keys', {})
+    key = upload_keys.get(uploaded_file.file_id)
+    if key is None:
+        key = upload_keys[uploaded_file.file_id] = DatasetCache.content_key(data)
+    return get_dataset_cache().load(
+        data,
+        parse=lambda raw: load_sleep_csv(io.BytesIO(raw)),
+        enrich=enrich_dataset,
+        key=key
+    )
+
+
+def generate_sample_data(n_samples=50, seed=0):
+    # Seeded so reruns produce the same frame and hit the analysis cache
+    return generate_cohort(n_samples, seed=seed)
 
 load_css('style.css')
 
 # Enhanced Header with animated elements
-st.markdown("""
+render_html("""
 <div style="text-align: center; margin-bottom: 3rem;">
     <div style="position: relative; display: inline-block;">
         <h1 style="margin-bottom: 0.5rem; position: relative; z-index: 2;">🌙 Sleep Analysis Dashboard</h1>
@@ -231,10 +130,10 @@ st.markdown("""
         </div>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 # Enhanced info box with interactive elements
-st.markdown("""
+render_html("""
 <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
             border: 1px solid rgba(75, 156, 211, 0.4); 
             border-radius: 16px; 
@@ -273,10 +172,10 @@ st.markdown("""
         </div>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 with st.sidebar:
-    st.markdown("""
+    render_html("""
     <div style="text-align: center; margin-bottom: 2rem;">
         <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.2), rgba(96, 165, 250, 0.1)); 
                     border: 1px solid rgba(75, 156, 211, 0.3); border-radius: 16px; padding: 1.5rem; margin-bottom: 1rem;">
@@ -286,30 +185,76 @@ with st.sidebar:
             </p>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
     
-    data_option = st.selectbox("📊 Data Source", ["Upload CSV", "Manual Entry", "Use Sample Data"])
+    data_option = st.selectbox("📊 Data Source", ["Upload CSV", "Manual Entry", "Saved Sleep Log", "Use Sample Data"])
     
+    store_filters = None
     if data_option == "Upload CSV":
         uploaded_file = st.file_uploader("📁 Upload your CSV", type=["csv"])
+    elif data_option == "Saved Sleep Log":
+        uploaded_file = None
+        sleep_store = get_sleep_store()
+        first_night, last_night = sleep_store.night_range()
+        if first_night is None:
+            st.info("No saved nights yet. Save an upload or your manual entries to the local store first.")
+        else:
+            # Only the selected slice is read from the store
+            nights = st.date_input("🗓️ Nights", value=(first_night.date(), last_night.date()),
+                                   min_value=first_night.date(), max_value=last_night.date())
+            start_night, end_night = (nights[0], nights[-1]) if nights else (None, None)
+            store_filters = dict(
+                start=start_night,
+                end=end_night,
+                gender=st.multiselect("Gender", sleep_store.levels('Gender')) or None,
+                university_year=st.multiselect("University Year", sleep_store.levels('University_Year')) or None,
+                student_ids=parse_student_ids(st.text_input("Student IDs", placeholder="e.g. 1, 2, 3")) or None
+            )
     elif data_option == "Manual Entry":
         uploaded_file = None
-        st.markdown("""
+        render_html("""
         <div style="background: rgba(75, 156, 211, 0.1); border: 1px solid rgba(75, 156, 211, 0.3); 
                     border-radius: 8px; padding: 1rem; margin-bottom: 1rem;">
             <p style="color: #E5E7EB; font-size: 0.9rem; margin: 0;">
                 📝 Enter your sleep data manually below
             </p>
         </div>
-        """, unsafe_allow_html=True)
+        """)
     else:
         uploaded_file = None
 
+    max_chart_points = st.number_input(
+        "🎯 Max points per chart", min_value=1_000, max_value=500_000,
+        value=max(DEFAULT_POINT_BUDGETS.values()), step=1_000,
+        help="Larger datasets are downsampled or binned so charts stay responsive"
+    )
+    # Scale every chart's budget relative to the largest default
+    chart_budgets = {
+        name: int(budget * max_chart_points / max(DEFAULT_POINT_BUDGETS.values()))
+        for name, budget in DEFAULT_POINT_BUDGETS.items()
+    }
+
+# Set when the dashboard shows the manual entry log, whose analysis and charts are updated per append
+sleep_log = None
+
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    df = load_uploaded_csv(uploaded_file)
+    replace_saved = st.sidebar.checkbox("Replace saved nights", help="Overwrite nights already saved for the same "
+                                        "Student_ID and night; rows without a Date are saved as today")
+    if st.sidebar.button("💾 Save to Local Store"):
+        save_to_store(df, replace_saved, container=st.sidebar)
+elif data_option == "Saved Sleep Log":
+    df = get_sleep_store().query(**store_filters) if store_filters is not None else None
+    if df is None or df.empty:
+        # Never fall back to sample data here: it would be analyzed as if it were the selected slice
+        st.info("No saved nights match these filters. Widen the date range or clear a filter to see an analysis."
+                if store_filters is not None else "No saved nights yet. Save an upload or manual entries first.")
+        st.stop()
 elif data_option == "Manual Entry":
+    manual_log = get_sleep_log()
+
     # Manual Data Entry Form
-    st.markdown("""
+    render_html("""
     <div style="margin: 2rem 0;">
         <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
                     border: 1px solid rgba(75, 156, 211, 0.4); border-radius: 20px; padding: 2rem; margin-bottom: 2rem;
@@ -322,52 +267,25 @@ elif data_option == "Manual Entry":
             </p>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
     
     # Create columns for form
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.95), rgba(30, 42, 58, 0.95)); 
-                    border: 1px solid rgba(75, 156, 211, 0.4); 
-                    border-radius: 20px; 
-                    padding: 2rem; 
-                    margin-bottom: 1.5rem;
-                    backdrop-filter: blur(20px);
-                    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-                    position: relative;
-                    overflow: hidden;">
-            <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px; 
-                        background: linear-gradient(90deg, #4B9CD3, #60A5FA, #93C5FD);"></div>
-            <h3 style="color: #4B9CD3; margin-bottom: 1.5rem; font-size: 1.4rem; display: flex; align-items: center; gap: 0.5rem;">
-                <span style="font-size: 1.2rem;">👤</span> Personal Information
-            </h3>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(section_card("👤", "Personal Information"), unsafe_allow_html=True)
         
+        student_id = st.number_input("Student ID", min_value=1, value=1, step=1,
+                                     help="Your nights are saved to the local store under this ID")
         age = st.number_input("Age", min_value=15, max_value=80, value=20, step=1)
         gender = st.selectbox("Gender", ["Male", "Female", "Other"])
         university_year = st.selectbox("University Year", ["1st Year", "2nd Year", "3rd Year", "4th Year", "Graduate"])
         
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.95), rgba(30, 42, 58, 0.95)); 
-                    border: 1px solid rgba(75, 156, 211, 0.4); 
-                    border-radius: 20px; 
-                    padding: 2rem; 
-                    margin-bottom: 1.5rem;
-                    backdrop-filter: blur(20px);
-                    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-                    position: relative;
-                    overflow: hidden;">
-            <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px; 
-                        background: linear-gradient(90deg, #4B9CD3, #60A5FA, #93C5FD);"></div>
-            <h3 style="color: #4B9CD3; margin-bottom: 1.5rem; font-size: 1.4rem; display: flex; align-items: center; gap: 0.5rem;">
-                <span style="font-size: 1.2rem;">🌙</span> Sleep Data
-            </h3>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(section_card("🌙", "Sleep Data"), unsafe_allow_html=True)
         
+        today = pd.Timestamp.today().date()
+        night = st.date_input("Night", value=today, max_value=today,
+                              help="The night these entries are for; multiple days end on this night")
         sleep_duration = st.slider("Sleep Duration (hours)", min_value=3.0, max_value=12.0, value=7.5, step=0.5)
         sleep_quality = st.slider("Sleep Quality (1-10)", min_value=1, max_value=10, value=7, step=1)
         
@@ -378,23 +296,7 @@ elif data_option == "Manual Entry":
         weekend_end = st.time_input("Weekend Sleep End Time", value=datetime.strptime("08:00", "%H:%M").time())
     
     with col2:
-        st.markdown("""
-        <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.95), rgba(30, 42, 58, 0.95)); 
-                    border: 1px solid rgba(75, 156, 211, 0.4); 
-                    border-radius: 20px; 
-                    padding: 2rem; 
-                    margin-bottom: 1.5rem;
-                    backdrop-filter: blur(20px);
-                    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-                    position: relative;
-                    overflow: hidden;">
-            <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px; 
-                        background: linear-gradient(90deg, #4B9CD3, #60A5FA, #93C5FD);"></div>
-            <h3 style="color: #4B9CD3; margin-bottom: 1.5rem; font-size: 1.4rem; display: flex; align-items: center; gap: 0.5rem;">
-                <span style="font-size: 1.2rem;">📚</span> Study & Lifestyle
-            </h3>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(section_card("📚", "Study & Lifestyle"), unsafe_allow_html=True)
         
         study_hours = st.slider("Study Hours per Day", min_value=0.0, max_value=12.0, value=5.0, step=0.5)
         screen_time = st.slider("Screen Time (hours)", min_value=0.0, max_value=16.0, value=4.0, step=0.5)
@@ -402,23 +304,7 @@ elif data_option == "Manual Entry":
         physical_activity = st.slider("Physical Workout(minutes/day)", min_value=0, max_value=180, value=45, step=5)
     
     # Add multiple entries option
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.95), rgba(30, 42, 58, 0.95)); 
-                border: 1px solid rgba(75, 156, 211, 0.4); 
-                border-radius: 20px; 
-                padding: 2rem; 
-                margin: 1.5rem 0;
-                backdrop-filter: blur(20px);
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-                position: relative;
-                overflow: hidden;">
-        <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px; 
-                    background: linear-gradient(90deg, #4B9CD3, #60A5FA, #93C5FD);"></div>
-        <h3 style="color: #4B9CD3; margin-bottom: 1.5rem; font-size: 1.4rem; display: flex; align-items: center; gap: 0.5rem;">
-            <span style="font-size: 1.2rem;">📊</span> Data Management
-        </h3>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(section_card("📊", "Data Management", margin="1.5rem 0"), unsafe_allow_html=True)
     
     col3, col4 = st.columns(2)
     
@@ -426,7 +312,7 @@ elif data_option == "Manual Entry":
         if st.button("🚀 Generate Analysis", type="primary"):
             # Create data dictionary
             manual_data = {
-                'Student_ID': [1],
+                'Student_ID': [student_id],
                 'Age': [age],
                 'Gender': [gender],
                 'University_Year': [university_year],
@@ -439,82 +325,55 @@ elif data_option == "Manual Entry":
                 'Weekday_Sleep_Start': [weekday_start.strftime("%H:%M")],
                 'Weekend_Sleep_Start': [weekend_start.strftime("%H:%M")],
                 'Weekday_Sleep_End': [weekend_end.strftime("%H:%M")],
-                'Weekend_Sleep_End': [weekend_end.strftime("%H:%M")]
+                'Weekend_Sleep_End': [weekend_end.strftime("%H:%M")],
+                'Date': [pd.Timestamp(night)]
             }
             
-            df = pd.DataFrame(manual_data)
-            st.session_state['manual_data'] = df
+            manual_log.append(pd.DataFrame(manual_data))
             st.success("✅ Data entered successfully! Scroll down to see your analysis.")
             st.balloons()
     
     with col4:
         if st.button("🗑️ Clear Data", type="secondary"):
-            if 'manual_data' in st.session_state:
-                del st.session_state['manual_data']
+            manual_log.clear()
             st.success("✅ Data cleared successfully!")
             st.rerun()
     
     # Add multiple days option
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.95), rgba(30, 42, 58, 0.95)); 
-                border: 1px solid rgba(75, 156, 211, 0.4); 
-                border-radius: 20px; 
-                padding: 2rem; 
-                margin: 1.5rem 0;
-                backdrop-filter: blur(20px);
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-                position: relative;
-                overflow: hidden;">
-        <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px; 
-                    background: linear-gradient(90deg, #4B9CD3, #60A5FA, #93C5FD);"></div>
-        <h3 style="color: #4B9CD3; margin-bottom: 1rem; font-size: 1.4rem; display: flex; align-items: center; gap: 0.5rem;">
-            <span style="font-size: 1.2rem;">📅</span> Add Multiple Days
-        </h3>
-        <p style="color: #E5E7EB; font-size: 1rem; line-height: 1.5; margin-bottom: 0;">
-            Want to track multiple days? Use this quick form to generate comprehensive sleep data:
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(section_card(
+        "📅", "Add Multiple Days",
+        "Want to track multiple days? Use this quick form to generate comprehensive sleep data:",
+        margin="1.5rem 0"
+    ), unsafe_allow_html=True)
     
     num_days = st.number_input("Number of days to add", min_value=1, max_value=30, value=7, step=1)
     
     if st.button("📊 Generate Multiple Days Data"):
-        # Generate multiple days of data with some variation
-        import random
-        
-        multiple_data = []
-        for i in range(num_days):
-            # Add some realistic variation to the data
-            sleep_var = random.uniform(-1, 1)
-            quality_var = random.randint(-2, 2)
-            study_var = random.uniform(-1, 1)
-            
-            day_data = {
-                'Student_ID': i + 1,
-                'Age': age,
-                'Gender': gender,
-                'University_Year': university_year,
-                'Sleep_Duration': max(3, min(12, sleep_duration + sleep_var)),
-                'Study_Hours': max(0, min(12, study_hours + study_var)),
-                'Screen_Time': screen_time,
-                'Caffeine_Intake': caffeine_intake,
-                'Physical_Activity': physical_activity,
-                'Sleep_Quality': max(1, min(10, sleep_quality + quality_var)),
-                'Weekday_Sleep_Start': weekday_start.strftime("%H:%M"),
-                'Weekend_Sleep_Start': weekend_start.strftime("%H:%M"),
-                'Weekday_Sleep_End': weekday_end.strftime("%H:%M"),
-                'Weekend_Sleep_End': weekend_end.strftime("%H:%M")
-            }
-            multiple_data.append(day_data)
-        
-        df = pd.DataFrame(multiple_data)
-        st.session_state['manual_data'] = df
+        # Generate multiple days of data with some realistic variation
+        rng = np.random.default_rng()
+        manual_log.append(pd.DataFrame({
+            'Student_ID': student_id,
+            'Age': age,
+            'Gender': gender,
+            'University_Year': university_year,
+            'Sleep_Duration': np.clip(sleep_duration + rng.uniform(-1, 1, num_days), 3, 12),
+            'Study_Hours': np.clip(study_hours + rng.uniform(-1, 1, num_days), 0, 12),
+            'Screen_Time': screen_time,
+            'Caffeine_Intake': caffeine_intake,
+            'Physical_Activity': physical_activity,
+            'Sleep_Quality': np.clip(sleep_quality + rng.integers(-2, 3, num_days), 1, 10),
+            'Weekday_Sleep_Start': weekday_start.strftime("%H:%M"),
+            'Weekend_Sleep_Start': weekend_start.strftime("%H:%M"),
+            'Weekday_Sleep_End': weekday_end.strftime("%H:%M"),
+            'Weekend_Sleep_End': weekend_end.strftime("%H:%M"),
+            'Date': pd.date_range(end=pd.Timestamp(night), periods=num_days, freq='D')
+        }))
         st.success(f"✅ Generated {num_days} days of sleep data! Scroll down to see your analysis.")
         st.balloons()
     
     # Show current data if exists
-    if 'manual_data' in st.session_state:
-        st.markdown("""
+    if len(manual_log):
+        render_html("""
         <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
                     border: 1px solid rgba(75, 156, 211, 0.4); 
                     border-radius: 16px; 
@@ -530,9 +389,9 @@ elif data_option == "Manual Entry":
                 <span style="font-size: 1rem;">📋</span> Current Data Summary
             </h4>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         
-        current_df = st.session_state['manual_data']
+        current_df = manual_log.frame()
         st.dataframe(current_df, use_container_width=True)
         
         # Download option
@@ -543,13 +402,18 @@ elif data_option == "Manual Entry":
             file_name="my_sleep_data.csv",
             mime="text/csv"
         )
+        replace_saved = st.checkbox("Replace saved nights",
+                                    help="Overwrite nights already saved for the same Student_ID and night")
+        if st.button("💾 Save to Local Store"):
+            save_to_store(current_df, replace_saved)
     
-    # Check if manual data exists in session state
-    if 'manual_data' in st.session_state:
-        df = st.session_state['manual_data']
+    # Check if any nights have been logged
+    if len(manual_log):
+        sleep_log = manual_log
+        df = manual_log.frame()
     else:
         # Show placeholder message
-        st.markdown("""
+        render_html("""
         <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
                     border: 1px solid rgba(75, 156, 211, 0.4); 
                     border-radius: 20px; 
@@ -589,34 +453,30 @@ elif data_option == "Manual Entry":
                 </p>
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         df = generate_sample_data()  # Use sample data as placeholder
 else:
     df = generate_sample_data()
 
-# Data processing for sleep cycles
-quality_bins = [0, 5, 8, 11]
-quality_labels = ['Poor', 'Good', 'Excellent']
-df['Quality_Category'] = pd.cut(df['Sleep_Quality'], bins=quality_bins, labels=quality_labels, right=False)
-
-stage_percentages = {
-    'Poor': {'Awake': 0.20, 'Light': 0.55, 'Deep': 0.15, 'REM': 0.10},
-    'Good': {'Awake': 0.10, 'Light': 0.50, 'Deep': 0.20, 'REM': 0.20},
-    'Excellent': {'Awake': 0.05, 'Light': 0.45, 'Deep': 0.25, 'REM': 0.25}
-}
-
-for stage in ['Awake', 'Light', 'Deep', 'REM']:
-    df[stage] = df.apply(
-        lambda row: row['Sleep_Duration'] * stage_percentages[row['Quality_Category']][stage],
-        axis=1
-    )
+results_cache = get_results_cache()
+if sleep_log is not None:
+    # Logged nights were enriched and analyzed as they were appended
+    fingerprint = sleep_log.fingerprint
+    analysis_results = sleep_log.analysis()
+    anomalies = sleep_log.anomalies
+else:
+    # Data processing for sleep cycles and timing (uploads come back from the cache already enriched)
+    if not uploaded_file:
+        enrich_dataset(df)
 
-analyzer = SleepAnalyzer()
-analysis_results = analyzer.analyze(df)
+    analyzer = SleepAnalyzer()
+    fingerprint = dataframe_fingerprint(df)
+    analysis_results = results_cache.get_or_compute(('analysis', fingerprint), lambda: analyzer.analyze(df))
 st.session_state['analysis_results'] = analysis_results
 st.session_state['df'] = df
+st.session_state['fingerprint'] = fingerprint
 
-st.markdown("""
+render_html("""
     <div style="display: flex; justify-content: space-around; gap: 1rem;">
         <div class="metric-card"><h3>Avg Sleep Duration</h3><p>{:.1f}h</p></div>
         <div class="metric-card"><h3>Sleep Quality</h3><p>{:.1f}/10</p></div>
@@ -628,10 +488,10 @@ st.markdown("""
     analysis_results['quality_score'],
     analysis_results['consistency_score'],
     df['Physical_Activity'].mean()
-), unsafe_allow_html=True)
+))
 
 # Enhanced Recommendations Section
-st.markdown("""
+render_html("""
 <div style="margin: 3rem 0;">
     <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
                 border: 1px solid rgba(75, 156, 211, 0.4); 
@@ -653,11 +513,11 @@ st.markdown("""
         </p>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 recommendations = get_recommendations(analysis_results)
 for i, rec in enumerate(recommendations):
-    st.markdown(f"""
+    render_html(f"""
     <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
                 border: 1px solid rgba(75, 156, 211, 0.4); 
                 border-radius: 16px; 
@@ -680,9 +540,29 @@ for i, rec in enumerate(recommendations):
             <p style="margin: 0; color: #E5E7EB; line-height: 1.6; font-size: 1.1rem; flex: 1;">{rec}</p>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
-charts = create_visualizations(df.copy())
+# Aggregate cube built once per dataset; slices and roll-ups read only its cells
+if sleep_log is not None:
+    cube = sleep_log.cube
+else:
+    cube = results_cache.get_or_compute(('cube', fingerprint), handle_error(lambda: build_cube(df)))
+if cube is not None and cube.dimensions:
+    with st.expander("🧊 Cohort Explorer"):
+        explore_col1, explore_col2 = st.columns(2)
+        with explore_col1:
+            group_by = st.multiselect("Group by", cube.dimensions, default=cube.dimensions[:1])
+        with explore_col2:
+            measure = st.selectbox("Metric", cube.measures, format_func=lambda column: column.replace('_', ' '))
+        st.dataframe(cube.summary(measure, by=group_by).round(2), use_container_width=True, hide_index=True)
+
+if sleep_log is not None:
+    charts = handle_error(lambda: sleep_log.visualizations(chart_budgets))()
+else:
+    charts = results_cache.get_or_compute(
+        ('charts', fingerprint, max_chart_points),
+        handle_error(lambda: create_visualizations(df.copy(), chart_budgets, cube=cube))
+    )
 tab_names = ["Overview", "Impact Analysis", "Sleep Cycles", "3D Factors", "Sleep Patterns", "Trend Analysis"]
 tabs = st.tabs(tab_names)
 
@@ -690,8 +570,27 @@ for tab, name in zip(tabs, tab_names):
     with tab:
         st.plotly_chart(charts.get(name), use_container_width=True)
 
+# Anomaly detection imports scikit-learn, so it runs once the metrics and charts are on screen
+if sleep_log is None:
+    anomalies = results_cache.get_or_compute(
+        ('anomalies', fingerprint),
+        handle_error(lambda: analyzer.detect_anomalies(df, fingerprint=fingerprint))
+    )
+st.session_state['analysis_results'] = dict(analysis_results, anomaly_count=len(anomalies) if anomalies else 0)
+if anomalies:
+    with st.expander(f"🔍 Unusual Sleep Patterns ({len(anomalies)} of {anomalies.n_scored} entries flagged)"):
+        st.caption("Entries that stand out across sleep and lifestyle factors. Lower scores are more unusual.")
+        st.dataframe(anomalies.to_frame(df)[anomalies.columns + ['Anomaly_Score']], use_container_width=True)
+
+if os.getenv("DEBUG") == "true":
+    cache_stats = results_cache.stats()
+    st.sidebar.caption(
+        f"Results cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"({cache_stats['size']}/{cache_stats['maxsize']} entries)"
+    )
+
 # Additional Information and Tips Section
-st.markdown("""
+render_html("""
 <div style="margin: 4rem 0 3rem 0;">
     <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
                 border: 1px solid rgba(75, 156, 211, 0.4); 
@@ -713,13 +612,13 @@ st.markdown("""
         </p>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 # Create columns for different information sections
 col1, col2 = st.columns(2)
 
 with col1:
-    st.markdown("""
+    render_html("""
     <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.9), rgba(30, 42, 58, 0.9)); 
                 border: 1px solid rgba(75, 156, 211, 0.3); 
                 border-radius: 16px; 
@@ -735,10 +634,10 @@ with col1:
             <li><strong>Academic Performance:</strong> Better sleep = better focus and learning</li>
         </ul>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
 with col2:
-    st.markdown("""
+    render_html("""
     <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.9), rgba(30, 42, 58, 0.9)); 
                 border: 1px solid rgba(75, 156, 211, 0.3); 
                 border-radius: 16px; 
@@ -753,10 +652,10 @@ with col2:
             <p><strong>💭 REM Sleep:</strong> Dreaming & memory processing (20-25% of night)</p>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
 # Tips Section
-st.markdown("""
+render_html("""
 <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.1), rgba(96, 165, 250, 0.1)); 
             border: 1px solid rgba(75, 156, 211, 0.3); 
             border-radius: 16px; 
@@ -799,10 +698,10 @@ st.markdown("""
         </div>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 # Fun Facts Section
-st.markdown("""
+render_html("""
 <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.9), rgba(30, 42, 58, 0.9)); 
             border: 1px solid rgba(75, 156, 211, 0.3); 
             border-radius: 16px; 
@@ -829,10 +728,10 @@ st.markdown("""
         </div>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 # Call to Action
-st.markdown("""
+render_html("""
 <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.25), rgba(96, 165, 250, 0.2)); 
             border: 2px solid rgba(75, 156, 211, 0.6); 
             border-radius: 20px; 
@@ -873,5 +772,5 @@ st.markdown("""
         </p>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
@@ -0,0 +1,63 @@
+"""Benchmark vectorized sleep-stage derivation against the row-wise apply path
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sleep_stages --rows 500000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from sleep_analyzer import QUALITY_BINS, QUALITY_LABELS, SLEEP_STAGES, STAGE_PERCENTAGES, derive_sleep_stages
+
+
+def apply_sleep_stages(df):
+    """The original per-row implementation, kept as the benchmark reference"""
+    df['Quality_Category'] = pd.cut(df['Sleep_Quality'], bins=QUALITY_BINS, labels=QUALITY_LABELS, right=False)
+    for stage in SLEEP_STAGES:
+        df[stage] = df.apply(
+            lambda row: row['Sleep_Duration'] * STAGE_PERCENTAGES[row['Quality_Category']][stage],
+            axis=1
+        )
+    return df
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Sleep_Duration': rng.normal(7, 1.5, rows).round(1),
+        'Sleep_Quality': rng.integers(1, 11, rows)
+    })
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        func(frame)
+        timings.append(time.perf_counter() - start)
+    return min(timings), frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows)
+    apply_time, expected = best_of(apply_sleep_stages, df, args.repeat)
+    vector_time, actual = best_of(derive_sleep_stages, df, args.repeat)
+    np.testing.assert_allclose(actual[SLEEP_STAGES].to_numpy(), expected[SLEEP_STAGES].to_numpy())
+
+    print(f"rows:       {args.rows:,}")
+    print(f"df.apply:   {apply_time:.4f}s")
+    print(f"vectorized: {vector_time:.4f}s")
+    print(f"speedup:    {apply_time / vector_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
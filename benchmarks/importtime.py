@@ -0,0 +1,141 @@
+"""Audit the cold start of the app, the chat page and the CLI
+
+Streamlit scripts are run once in a fresh interpreter with
+``streamlit.testing``: the report gives the first script run, when the
+first chart was sent and when each heavy package was first imported, so
+work that blocks the first paint shows up even when it imports lazily.
+Every entry point's module set is also imported under
+``python -X importtime`` to list the heaviest packages by self time. Run
+from the repository root:
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --budget-ms 4000
+
+With ``--budget-ms`` the exit status is 1 when a script's first run (or the
+CLI's imports) exceeds it.
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules each entry point imports before its first element is rendered
+ENTRY_POINTS = {
+    'app.py': ['streamlit', 'pandas', 'numpy', 'sleep_analyzer', 'sleep_timing', 'charts', 'dataset_cache',
+               'sleep_data', 'caching', 'synthetic', 'style', 'sleep_log', 'sleep_store',
+               'dotenv'],
+    'pages/chat_interface.py': ['streamlit', 'caching', 'chat_backend', 'chat_context', 'chat_history',
+                                'response_cache', 'style'],
+    'sleep_analyzer (CLI)': ['sleep_analyzer']
+}
+# Packages whose first import during a script run is reported
+HEAVY_PACKAGES = ('plotly', 'sklearn', 'scipy', 'joblib', 'groq')
+
+# Runs one script with streamlit.testing and prints its timings as JSON; argv: script, heavy packages...
+FIRST_RUN = """
+import json, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+heavy, imported, charts, start = set(sys.argv[2:]), {}, [], []
+
+def on_import(event, args):
+    if event == 'import' and start:
+        name = args[0].split('.')[0]
+        if name in heavy and name not in imported:
+            imported[name] = time.perf_counter() - start[0]
+
+plotly_chart = streamlit.plotly_chart
+
+def timed_plotly_chart(*args, **kwargs):
+    charts.append(time.perf_counter() - start[0])
+    return plotly_chart(*args, **kwargs)
+
+sys.addaudithook(on_import)
+streamlit.plotly_chart = timed_plotly_chart
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+start.append(time.perf_counter())
+app.run()
+print(json.dumps({
+    'seconds': time.perf_counter() - start[0],
+    'first_chart': charts[0] if charts else None,
+    'imported': imported,
+    'exceptions': [str(exception.value) for exception in app.exception]
+}))
+"""
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def import_profile(modules):
+    """Import ``modules`` in a fresh interpreter and return ``[(self_us, cumulative_us, depth, name)]``"""
+    code = '; '.join(f'import {module}' for module in modules)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+
+def first_run(script):
+    """Run a Streamlit script once in a fresh interpreter and return its timings in seconds"""
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_RUN, str(ROOT / script), *HEAVY_PACKAGES],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(rows, top):
+    total_us = sum(self_us for self_us, _, _, _ in rows)
+    packages = Counter()
+    for self_us, _, _, name in rows:
+        packages[name.split('.')[0]] += self_us
+    return total_us, packages.most_common(top)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=10, help="Heaviest packages listed per entry point")
+    parser.add_argument('--budget-ms', type=float, help="Fail when an entry point imports slower than this")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per entry point; the best is kept")
+    args = parser.parse_args(argv)
+
+    over_budget = []
+    for entry_point, modules in ENTRY_POINTS.items():
+        runs = [summarize(import_profile(modules), args.top) for _ in range(args.repeat)]
+        total_us, packages = min(runs, key=lambda run: run[0])
+        elapsed_ms = total_us / 1000
+        print(f"{entry_point}: imports {elapsed_ms:.0f} ms")
+        if entry_point.endswith('.py'):
+            run = min((first_run(entry_point) for _ in range(args.repeat)), key=lambda run: run['seconds'])
+            elapsed_ms = run['seconds'] * 1000
+            first_chart = f", first chart at {run['first_chart'] * 1000:.0f} ms" if run['first_chart'] else ""
+            print(f"    first run {elapsed_ms:.0f} ms{first_chart}")
+            for package, seconds in sorted(run['imported'].items(), key=lambda item: item[1]):
+                print(f"    {package} imported at {seconds * 1000:.0f} ms")
+            for exception in run['exceptions']:
+                print(f"    exception: {exception}")
+        for package, self_us in packages:
+            print(f"    {package:<24} {self_us / 1000:>8.1f} ms")
+        if args.budget_ms is not None and elapsed_ms > args.budget_ms:
+            over_budget.append(entry_point)
+
+    for entry_point in over_budget:
+        print(f"OVER BUDGET {entry_point} (> {args.budget_ms:.0f} ms)", file=sys.stderr)
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
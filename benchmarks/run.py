@@ -0,0 +1,168 @@
+"""Benchmark the loading, analysis and visualization pipeline on synthetic cohorts
+
+Each stage runs at every requested size and records the best wall time,
+the peak traced memory and, for chart stages, the JSON payload sent to the
+browser. Run from the repository root:
+
+    python -m benchmarks.run --sizes 1k,100k --save baseline.json
+    python -m benchmarks.run --sizes 1k,100k --compare baseline.json
+
+With ``--compare`` the exit status is 1 when any stage is slower or uses
+more memory than the baseline by more than ``--threshold``. Add ``10M`` to
+``--sizes`` for the full-scale run (several GB of RAM and a few minutes).
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from charts import create_visualizations
+from sleep_analyzer import SleepAnalyzer, derive_sleep_stages
+from sleep_data import load_sleep_csv
+from sleep_timing import add_timing_features
+from synthetic import write_cohort
+
+SIZE_SUFFIXES = {'k': 1_000, 'M': 1_000_000}
+METRICS = ('seconds', 'peak_bytes')
+
+
+@dataclass
+class Stage:
+    name: str
+    # (raw_df, enriched_df, csv_path) -> args for run; untimed and called before every run
+    prepare: Callable
+    run: Callable
+
+
+def _figures_payload(figures):
+    return sum(len(fig.to_json()) for fig in figures.values())
+
+
+STAGES = [
+    Stage('load_csv', lambda raw, enriched, path: (path,), load_sleep_csv),
+    Stage('derive_stages', lambda raw, enriched, path: (raw.copy(),), derive_sleep_stages),
+    Stage('analyze', lambda raw, enriched, path: (raw,), lambda df: SleepAnalyzer().analyze(df)),
+    Stage('create_visualizations', lambda raw, enriched, path: (enriched.copy(),), create_visualizations)
+]
+
+
+def parse_size(text):
+    """Parse row counts such as ``1000``, ``100k`` or ``10M``"""
+    text = text.strip()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def measure(stage, inputs, repeat):
+    """Best-of-``repeat`` wall time, then one traced run for the memory peak"""
+    timings = []
+    for _ in range(repeat):
+        args = stage.prepare(*inputs)
+        start = time.perf_counter()
+        result = stage.run(*args)
+        timings.append(time.perf_counter() - start)
+
+    args = stage.prepare(*inputs)
+    tracemalloc.start()
+    try:
+        stage.run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    record = {'seconds': min(timings), 'peak_bytes': peak}
+    if isinstance(result, dict) and result and all(hasattr(fig, 'to_json') for fig in result.values()):
+        record['payload_bytes'] = _figures_payload(result)
+    return record
+
+
+def run_suite(sizes, stages, repeat, workdir, seed=0):
+    results = {}
+    for rows in sizes:
+        csv_path = Path(workdir) / f'cohort_{rows}.csv'
+        write_cohort(csv_path, rows, seed=seed)
+        raw = load_sleep_csv(csv_path)
+        enriched = add_timing_features(derive_sleep_stages(raw.copy()))
+        inputs = (raw, enriched, csv_path)
+
+        for stage in stages:
+            key = f'{stage.name}@{rows}'
+            results[key] = measure(stage, inputs, repeat)
+            print(format_record(key, results[key]), file=sys.stderr)
+        csv_path.unlink(missing_ok=True)
+    return results
+
+
+def format_record(key, record):
+    line = f"{key:<32} {record['seconds']:>9.4f}s {record['peak_bytes'] / 1024 ** 2:>10.1f} MiB"
+    if 'payload_bytes' in record:
+        line += f" {record['payload_bytes'] / 1024 ** 2:>10.2f} MiB payload"
+    return line
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """Return the regressions of ``results`` against ``baseline`` as readable lines"""
+    regressions = []
+    for key, record in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in METRICS + ('payload_bytes',):
+            if metric not in record or metric not in reference:
+                continue
+            # Sub-``min_seconds`` timings are dominated by noise
+            if metric == 'seconds' and record[metric] < min_seconds:
+                continue
+            limit = reference[metric] * (1 + threshold)
+            if record[metric] > limit:
+                regressions.append(
+                    f"{key} {metric}: {record[metric]:,.4g} > {reference[metric]:,.4g} (+{threshold:.0%} allowed)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1k,100k', help="Comma-separated row counts, e.g. 1k,100k,10M")
+    parser.add_argument('--stages', default=','.join(stage.name for stage in STAGES),
+                        help="Comma-separated stages to run")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage; the best is kept")
+    parser.add_argument('--save', help="Write the results as JSON to this file")
+    parser.add_argument('--compare', help="Baseline JSON from an earlier --save")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument('--min-seconds', type=float, default=0.01,
+                        help="Ignore time regressions on stages faster than this")
+    args = parser.parse_args(argv)
+
+    names = set(args.stages.split(','))
+    unknown = names - {stage.name for stage in STAGES}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    stages = [stage for stage in STAGES if stage.name in names]
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_suite(sizes, stages, args.repeat, workdir)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def dataframe_fingerprint(df, sample_rows=None):
+    """Cheap content fingerprint of a DataFrame
+
+    Combines the shape, column names and dtypes with a vectorized
+    ``hash_pandas_object`` digest of the rows. With ``sample_rows`` set,
+    only that many evenly spaced rows (always including the first and last)
+    are hashed, trading exactness for constant cost on very large frames.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(df.shape).encode())
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+
+    rows = df
+    if sample_rows and len(df) > sample_rows:
+        rows = df.iloc[np.linspace(0, len(df) - 1, sample_rows).astype(np.intp)]
+    if len(rows):
+        digest.update(pd.util.hash_pandas_object(rows, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss
+
+        ``None`` results are returned but not cached, so failed computations
+        are retried on the next call.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,578 @@
+import numpy as np
+import pandas as pd
+
+from sleep_cube import MISSING_LEVEL, build_cube
+from timeseries import (FREQUENCIES, ROLLING_WINDOWS, choose_frequency, has_dates, period_start, resample_metrics,
+                        time_indexed, to_dates, trend)
+
+# Maximum number of points each chart sends to the browser
+DEFAULT_POINT_BUDGETS = {
+    "Overview": 2_000,
+    "Impact Analysis": 20_000,
+    "3D Factors": 10_000,
+    "Sleep Patterns": 20_000,
+    "Trend Analysis": 5_000
+}
+
+# Chart titles; sampled charts add a coverage line below them
+IMPACT_TITLE = "Study Hours vs Sleep Quality Impact"
+FACTORS_TITLE = "3D Analysis: Screen Time, Activity & Sleep Duration"
+PATTERNS_TITLE = "Sleep Duration Patterns Over Time"
+TREND_TITLE = "Sleep Duration Trend Analysis"
+GROUP_COLORS = ["#4B9CD3", "#F59E0B", "#10B981", "#EF4444", "#8B5CF6"]
+# Unit of each resampling frequency, for rolling-window offsets and subtitles
+PERIOD_UNITS = {'D': 'day', 'W': 'week', 'M': 'month'}
+# plotly express size_max of each bubble chart, needed to rescale marker sizes on append
+IMPACT_SIZE_MAX = 60
+BUBBLE_SIZE_MAX = 20
+# Groups of the Overview box plot: one trace per Gender, one box per University_Year
+OVERVIEW_GROUPS = ('Gender', 'University_Year')
+
+
+def stratified_sample(df, by, n, seed=0):
+    """Sample about ``n`` rows keeping each group's share of the data (at least one row per group)"""
+    if len(df) <= n:
+        return df
+    groups = df.groupby(by, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+    sizes = np.bincount(groups)
+    quotas = np.maximum(np.round(sizes * n / len(df)), 1)
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(df)), groups))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rank_in_group = np.empty(len(df), dtype=np.intp)
+    rank_in_group[order] = np.arange(len(df)) - starts[groups[order]]
+    return df[rank_in_group < quotas[groups]]
+
+
+def _coverage_title(title, shown, total):
+    return f"{title}<br><sup>Showing {shown:,} of {total:,} rows ({shown / max(total, 1):.1%})</sup>"
+
+
+def _binned_heatmap(df, x, y, title, nbins=(40, 20)):
+    """2D histogram computed on the server so only the bin counts reach the browser"""
+    import plotly.graph_objects as go
+
+    data = df[[x, y]].apply(pd.to_numeric, errors='coerce').dropna()
+    counts, x_edges, y_edges = np.histogram2d(data[x], data[y], bins=nbins)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts.T,
+        colorscale=[[0, "rgba(15, 28, 46, 0.8)"], [1, "#4B9CD3"]],
+        colorbar=dict(title="Entries")
+    ))
+    fig.update_layout(
+        title=f"{title}<br><sup>Binned from all {len(data):,} rows</sup>",
+        xaxis_title=x.replace('_', ' '),
+        yaxis_title=y.replace('_', ' ')
+    )
+    return fig
+
+
+def _group_labels(series):
+    return series.astype('string').fillna(MISSING_LEVEL)
+
+
+def _box_summary(cube, measure, by):
+    """Per-group quartiles from the cube with the Tukey bounds 1.5 IQR beyond the box"""
+    summary = cube.summary(measure, by=by, quantiles=(0.25, 0.5, 0.75)).reset_index(drop=True)
+    iqr = (summary['q75'] - summary['q25']).to_numpy()
+    return summary, summary['q25'].to_numpy() - 1.5 * iqr, summary['q75'].to_numpy() + 1.5 * iqr
+
+
+def _group_values(summary, df, measure, by):
+    """Group position in ``summary`` and value of every row with a known group and measure"""
+    groups = pd.MultiIndex.from_frame(summary[list(by)].astype('string')).get_indexer(
+        pd.MultiIndex.from_arrays([_group_labels(df[column]) for column in by])
+    )
+    values = pd.to_numeric(df[measure], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = (groups >= 0) & ~np.isnan(values)
+    return groups[valid], values[valid]
+
+
+def _whiskers_and_outliers(summary, low_bound, high_bound, groups, values, max_outliers, whiskers=None):
+    """Fill in whiskers and capped outliers from candidate ``values``; ``whiskers`` seeds the extremes"""
+    inside = (values >= low_bound[groups]) & (values <= high_bound[groups])
+    lower_whisker, upper_whisker = whiskers if whiskers is not None else (
+        summary['q25'].to_numpy(dtype=np.float64, copy=True), summary['q75'].to_numpy(dtype=np.float64, copy=True)
+    )
+    np.minimum.at(lower_whisker, groups[inside], values[inside])
+    np.maximum.at(upper_whisker, groups[inside], values[inside])
+
+    # Most extreme outliers first within each group, capped per group
+    outlier_groups, outlier_values = groups[~inside], values[~inside]
+    distance = np.maximum(low_bound[outlier_groups] - outlier_values, outlier_values - high_bound[outlier_groups])
+    order = np.lexsort((-distance, outlier_groups))
+    outlier_groups, outlier_values = outlier_groups[order], outlier_values[order]
+    starts = np.searchsorted(outlier_groups, np.arange(len(summary) + 1))
+    outliers = [outlier_values[starts[g]:min(starts[g + 1], starts[g] + max_outliers)].tolist()
+                for g in range(len(summary))]
+
+    iqr = (summary['q75'] - summary['q25']).to_numpy()
+    return summary.assign(
+        lowerfence=lower_whisker,
+        upperfence=upper_whisker,
+        notchspan=1.57 * iqr / np.sqrt(summary['count'].to_numpy()),
+        n_outliers=np.diff(starts),
+        outliers=outliers
+    )
+
+
+def box_summaries(df, measure, by, cube=None, max_outliers=100, outlier_budget=None):
+    """Box-plot statistics per group, computed on the server
+
+    Quartiles, means and counts come from the aggregate cube. Tukey whiskers
+    (the most extreme values within 1.5 IQR of the box) and outliers come
+    from one vectorized pass over the rows. Each group keeps at most
+    ``max_outliers`` outliers, the most extreme first; ``outlier_budget``
+    instead splits a total evenly across the groups. Returns one row per
+    group with the ``go.Box`` fields and an ``outliers`` list.
+    """
+    cube = cube if cube is not None else build_cube(df)
+    summary, low_bound, high_bound = _box_summary(cube, measure, by)
+    if outlier_budget is not None:
+        max_outliers = max(outlier_budget // max(len(summary), 1), 1)
+    groups, values = _group_values(summary, df, measure, by)
+    return _whiskers_and_outliers(summary, low_bound, high_bound, groups, values, max_outliers)
+
+
+def _box_plot(summaries, measure, x, color, title, colors):
+    """Grouped, notched box plot from precomputed summaries; only the capped outliers are sent as points"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for index, (group, rows) in enumerate(summaries.groupby(color, sort=False)):
+        fig.add_trace(go.Box(
+            name=str(group),
+            x=rows[x].tolist(),
+            y=rows['outliers'].tolist(),
+            q1=rows['q25'].tolist(),
+            median=rows['q50'].tolist(),
+            q3=rows['q75'].tolist(),
+            lowerfence=rows['lowerfence'].tolist(),
+            upperfence=rows['upperfence'].tolist(),
+            mean=rows['mean'].tolist(),
+            notchspan=rows['notchspan'].tolist(),
+            notched=True,
+            boxpoints='outliers',
+            marker_color=colors[index % len(colors)]
+        ))
+    fig.update_layout(
+        title=title,
+        boxmode='group',
+        xaxis_title=x.replace('_', ' '),
+        yaxis_title=measure.replace('_', ' '),
+        legend_title_text=color
+    )
+    return fig
+
+
+def _overview_plot(summaries, max_outliers):
+    fig = _box_plot(summaries, 'Sleep_Duration', x='University_Year', color='Gender',
+                    title="Sleep Duration Distribution by University Year", colors=GROUP_COLORS)
+    # Whether every outlier was sent, which lets an append update the boxes from the new rows alone
+    fig.update_layout(meta=dict(max_outliers=max_outliers,
+                                complete=bool((summaries['n_outliers'] <= max_outliers).all())))
+    return fig
+
+
+def _overview_figure(df, cube, budget):
+    summaries = box_summaries(df, 'Sleep_Duration', OVERVIEW_GROUPS, cube=cube, outlier_budget=budget)
+    return _overview_plot(summaries, max(budget // max(len(summaries), 1), 1))
+
+
+def _extend_overview(fig, delta, cube, budget):
+    """Overview updated with the rows ``delta`` only, or None when the boxes need a pass over every row
+
+    The earlier rows enter only through the old whiskers and the complete
+    outlier lists, which is exact as long as every old whisker stays within
+    the new Tukey bounds and the per-group outlier cap is unchanged.
+    """
+    meta = fig.layout.meta
+    if not isinstance(meta, dict) or not meta.get('complete'):
+        return None
+    summary, low_bound, high_bound = _box_summary(cube, 'Sleep_Duration', OVERVIEW_GROUPS)
+    max_outliers = max(budget // max(len(summary), 1), 1)
+    if max_outliers != meta['max_outliers']:
+        return None
+
+    boxes = [(trace.name, year, low, high, outliers) for trace in fig.data
+             for year, low, high, outliers in zip(trace.x, trace.lowerfence, trace.upperfence, trace.y)]
+    positions = pd.MultiIndex.from_frame(summary[list(OVERVIEW_GROUPS)].astype('string')).get_indexer(
+        pd.MultiIndex.from_tuples([box[:2] for box in boxes]) if boxes else pd.MultiIndex.from_arrays([[], []])
+    )
+    lower_whisker = summary['q25'].to_numpy(dtype=np.float64, copy=True)
+    upper_whisker = summary['q75'].to_numpy(dtype=np.float64, copy=True)
+    old_groups, old_values = [], []
+    for g, (_, _, low, high, outliers) in zip(positions, boxes):
+        if g < 0 or low < low_bound[g] or high > high_bound[g]:
+            return None
+        lower_whisker[g] = min(lower_whisker[g], low)
+        upper_whisker[g] = max(upper_whisker[g], high)
+        old_groups.extend([g] * len(outliers))
+        old_values.extend(outliers)
+
+    groups, values = _group_values(summary, delta, 'Sleep_Duration', OVERVIEW_GROUPS)
+    summaries = _whiskers_and_outliers(
+        summary, low_bound, high_bound,
+        np.concatenate([np.asarray(old_groups, dtype=np.int64), groups]),
+        np.concatenate([np.asarray(old_values, dtype=np.float64), values]),
+        max_outliers, whiskers=(lower_whisker, upper_whisker)
+    )
+    return _overview_plot(summaries, max_outliers)
+
+
+def _series_title(title, freq, n_nights, window=None):
+    rolling = f", {window}-{PERIOD_UNITS[freq]} rolling mean" if window else ""
+    return f"{title}<br><sup>{FREQUENCIES[freq][1]} means of {n_nights:,} nights{rolling}</sup>"
+
+
+def _no_dates_figure(title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.update_layout(title=title, xaxis_visible=False, yaxis_visible=False, annotations=[dict(
+        text="Add a Date column to see how sleep changes over time", showarrow=False,
+        xref='paper', yref='paper', x=0.5, y=0.5, font_size=16
+    )])
+    return fig
+
+
+def _pattern_traces(series):
+    """One line per gender of resampled mean sleep duration"""
+    import plotly.graph_objects as go
+
+    return [
+        go.Scattergl(
+            name=str(gender),
+            x=rows['Date'],
+            y=rows['Sleep_Duration'],
+            customdata=np.column_stack([rows['nights'], rows['Sleep_Quality']]),
+            hovertemplate=(f"{gender}<br>%{{x|%Y-%m-%d}}<br>Sleep: %{{y:.2f}}h<br>"
+                           "Quality: %{customdata[1]:.1f}<br>Nights: %{customdata[0]}<extra></extra>"),
+            mode='lines+markers',
+            marker_color=GROUP_COLORS[index % len(GROUP_COLORS)]
+        )
+        for index, (gender, rows) in enumerate(series.groupby('Gender', sort=True))
+    ]
+
+
+def _trend_traces(series, freq):
+    """Rolling mean with a one standard deviation band, over the per-period means"""
+    import plotly.graph_objects as go
+
+    upper = series['rolling_mean'] + series['rolling_std'].fillna(0)
+    lower = series['rolling_mean'] - series['rolling_std'].fillna(0)
+    return [
+        go.Scatter(name="Rolling +1 SD", x=series['Date'], y=upper, mode='lines', line_width=0,
+                   showlegend=False, hoverinfo='skip'),
+        go.Scatter(name="Rolling ±1 SD", x=series['Date'], y=lower, mode='lines', line_width=0,
+                   fill='tonexty', fillcolor="rgba(75, 156, 211, 0.2)", hoverinfo='skip'),
+        go.Scatter(name="Rolling mean", x=series['Date'], y=series['rolling_mean'], mode='lines',
+                   line=dict(color="#4B9CD3", width=3)),
+        go.Scattergl(name=f"{FREQUENCIES[freq][1]} mean", x=series['Date'], y=series['Sleep_Duration'],
+                     customdata=series['nights'], mode='markers', marker=dict(color="#93C5FD", size=6),
+                     hovertemplate="%{x|%Y-%m-%d}<br>Sleep: %{y:.2f}h<br>Nights: %{customdata}<extra></extra>")
+    ]
+
+
+def _time_series_figures(df, budgets):
+    """Sleep Patterns and Trend Analysis figures plotted from the resampled series
+
+    The frequency is the finest that keeps each chart within its point
+    budget, so the payload depends on the time range, not the row count.
+    """
+    import plotly.graph_objects as go
+
+    if not has_dates(df):
+        return _no_dates_figure(PATTERNS_TITLE), _no_dates_figure(TREND_TITLE)
+
+    indexed = time_indexed(df)
+    first, last = indexed.index[0], indexed.index[-1]
+    n_genders = max(_group_labels(indexed['Gender']).nunique(), 1)
+    # The dated range travels with the figures so appends can update it from the new rows alone
+    span = dict(first=first.strftime('%Y-%m-%d'), last=last.strftime('%Y-%m-%d'), nights=len(indexed))
+    patterns_freq = choose_frequency(first, last, budgets["Sleep Patterns"] // n_genders)
+    patterns = resample_metrics(indexed, patterns_freq, columns=('Sleep_Duration', 'Sleep_Quality'), by='Gender')
+    fig_patterns = go.Figure(_pattern_traces(patterns))
+    fig_patterns.update_layout(title=_series_title(PATTERNS_TITLE, patterns_freq, len(indexed)),
+                               meta=dict(frequency=patterns_freq, **span), legend_title_text='Gender',
+                               xaxis_title='Date', yaxis_title='Sleep Duration', yaxis_range=[0, 12])
+
+    trend_freq, series = trend(indexed, max_periods=budgets["Trend Analysis"])
+    fig_trend = go.Figure(_trend_traces(series, trend_freq))
+    fig_trend.update_layout(title=_series_title(TREND_TITLE, trend_freq, len(indexed), ROLLING_WINDOWS[trend_freq]),
+                            meta=dict(frequency=trend_freq, **span), xaxis_title='Date', yaxis_title='Sleep Duration')
+    return fig_patterns, fig_trend
+
+
+def create_visualizations(df, budgets=None, cube=None):
+    # Plotly is imported on first render so pages without charts never pay for it
+    import plotly.express as px
+
+    budgets = {**DEFAULT_POINT_BUDGETS, **(budgets or {})}
+    total_rows = len(df)
+
+    # Enhanced color scheme for better visual appeal
+    plot_bgcolor = "rgba(15, 28, 46, 0.8)"
+    paper_bgcolor = "rgba(30, 42, 58, 0.9)"
+    font_color = "#FFFFFF"
+
+    # Enhanced color palette
+    color_palette = ["#4B9CD3", "#60A5FA", "#93C5FD", "#DBEAFE", "#EFF6FF"]
+    color_palette_2 = GROUP_COLORS
+
+    # Overview Tab: box statistics are computed on the server; only capped outliers are sent as points
+    fig_overview = _overview_figure(df, cube, budgets["Overview"])
+    fig_overview.update_layout(
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=paper_bgcolor,
+        font_color=font_color,
+        title_font_size=18,
+        title_font_color="#4B9CD3",
+        showlegend=True,
+        legend=dict(bgcolor="rgba(30, 42, 58, 0.8)", bordercolor="rgba(75, 156, 211, 0.3)"),
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+
+    # Impact Analysis Tab: WebGL scatter within budget, server-side binning beyond it
+    if total_rows <= budgets["Impact Analysis"]:
+        fig_impact = px.scatter(df, x='Study_Hours', y='Sleep_Quality', size='Sleep_Duration',
+                                color='University_Year', title=_coverage_title(IMPACT_TITLE, total_rows, total_rows),
+                                hover_name='Gender', size_max=IMPACT_SIZE_MAX,
+                                render_mode='webgl',
+                                color_discrete_sequence=color_palette_2)
+    else:
+        fig_impact = _binned_heatmap(df, 'Study_Hours', 'Sleep_Quality', IMPACT_TITLE)
+    fig_impact.update_layout(
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=paper_bgcolor,
+        font_color=font_color,
+        title_font_size=18,
+        title_font_color="#4B9CD3",
+        showlegend=True,
+        legend=dict(bgcolor="rgba(30, 42, 58, 0.8)", bordercolor="rgba(75, 156, 211, 0.3)"),
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+
+    # Sleep Cycles Tab
+    total_stages = df[['Awake', 'Light', 'Deep', 'REM']].sum()
+    sleep_stages_data = {
+        'stage': total_stages.index,
+        'value': total_stages.values
+    }
+    fig_sunburst = px.sunburst(sleep_stages_data,
+                               names='stage',
+                               parents=['Sleep Stages'] * 4,
+                               values='value',
+                               title='Sleep Cycle Distribution Analysis',
+                               color='stage',
+                               color_discrete_map={
+                                   'Awake': '#F59E0B', 'Light': '#60A5FA',
+                                   'Deep': '#10B981', 'REM': '#8B5CF6'
+                               })
+    fig_sunburst.update_layout(
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=paper_bgcolor,
+        font_color=font_color,
+        title_font_size=18,
+        title_font_color="#4B9CD3",
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+
+    # 3D Factors: stratified by caffeine intake so every color group stays represented
+    df_3d = stratified_sample(df, 'Caffeine_Intake', budgets["3D Factors"])
+    fig_3d = px.scatter_3d(df_3d, x='Screen_Time', y='Physical_Activity', z='Sleep_Duration',
+                           color='Caffeine_Intake', size='Sleep_Quality',
+                           title=_coverage_title(FACTORS_TITLE, len(df_3d), total_rows),
+                           opacity=0.8,
+                           color_continuous_scale=color_palette)
+    fig_3d.update_layout(
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=paper_bgcolor,
+        font_color=font_color,
+        title_font_size=18,
+        title_font_color="#4B9CD3",
+        scene=dict(
+            bgcolor=plot_bgcolor,
+            xaxis=dict(backgroundcolor=plot_bgcolor, gridcolor="rgba(75, 156, 211, 0.2)"),
+            yaxis=dict(backgroundcolor=plot_bgcolor, gridcolor="rgba(75, 156, 211, 0.2)"),
+            zaxis=dict(backgroundcolor=plot_bgcolor, gridcolor="rgba(75, 156, 211, 0.2)")
+        ),
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+
+    # Sleep Patterns and Trend Analysis: resampled per day, week or month from the Date column
+    fig_animated, fig_trend = _time_series_figures(df, budgets)
+    fig_animated.update_layout(
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=paper_bgcolor,
+        font_color=font_color,
+        title_font_size=18,
+        title_font_color="#4B9CD3",
+        showlegend=True,
+        legend=dict(bgcolor="rgba(30, 42, 58, 0.8)", bordercolor="rgba(75, 156, 211, 0.3)"),
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+
+    fig_trend.update_layout(
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=paper_bgcolor,
+        font_color=font_color,
+        title_font_size=18,
+        title_font_color="#4B9CD3",
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+
+    return {
+        "Overview": fig_overview,
+        "Impact Analysis": fig_impact,
+        "Sleep Cycles": fig_sunburst,
+        "3D Factors": fig_3d,
+        "Sleep Patterns": fig_animated,
+        "Trend Analysis": fig_trend
+    }
+
+
+def _extend_trace(trace, **columns):
+    """Append values to array properties of a trace; names use underscores for nesting, e.g. ``marker_size``"""
+    for name, values in columns.items():
+        path = name.replace('_', '.')
+        existing = trace[path]
+        trace[path] = np.concatenate([np.asarray(existing if existing is not None else []), np.asarray(values)])
+
+
+def _grow_sizeref(fig, sizes, size_max):
+    """Rescale bubble sizes so the largest new marker still fits, as plotly express would"""
+    largest = np.nanmax(np.asarray(sizes, dtype=np.float64), initial=0.0)
+    for trace in fig.data:
+        trace.marker.sizeref = max(trace.marker.sizeref or 0.0, largest / size_max ** 2)
+
+
+def _splice_trace(trace, since, **columns):
+    """Replace the points of a date-axis trace from ``since`` on; names as in ``_extend_trace``"""
+    keep = (pd.to_datetime(pd.Series(trace.x if trace.x is not None else [], dtype=object)) < since).to_numpy()
+    for name, values in columns.items():
+        path = name.replace('_', '.')
+        existing = trace[path]
+        kept = np.asarray(existing)[keep] if existing is not None and len(existing) else []
+        trace[path] = np.concatenate([kept, values]) if len(kept) else np.asarray(values)
+
+
+def _time_series_plan(figures, delta, budgets):
+    """Frequencies and dated range of the time-series figures after appending ``delta``
+
+    Only the new rows' dates are parsed; the earlier range comes from the
+    figure metadata. Returns None when the figures must be rebuilt.
+    """
+    patterns, trend_fig = figures["Sleep Patterns"], figures["Trend Analysis"]
+    meta = (patterns.layout.meta, trend_fig.layout.meta)
+    if any(not isinstance(value, dict) or 'nights' not in value for value in meta):
+        return None
+    dates = to_dates(delta['Date']).dropna()
+    first = min(pd.Timestamp(meta[1]['first']), dates.min())
+    last = max(pd.Timestamp(meta[1]['last']), dates.max())
+    genders = {trace.name for trace in patterns.data}
+    if not set(_group_labels(delta['Gender'])) <= genders:
+        return None
+    patterns_freq = choose_frequency(first, last, budgets["Sleep Patterns"] // max(len(genders), 1))
+    trend_freq = choose_frequency(first, last, budgets["Trend Analysis"])
+    if (patterns_freq, trend_freq) != (meta[0]['frequency'], meta[1]['frequency']):
+        return None
+    span = dict(first=first.strftime('%Y-%m-%d'), last=last.strftime('%Y-%m-%d'),
+                nights=meta[1]['nights'] + len(dates))
+    return (patterns_freq, trend_freq), span
+
+
+def _extend_time_series(figures, delta, df, frequencies, span):
+    """Recompute the resampled series from the first period ``delta`` touches and splice them into the figures
+
+    Only the rows from that period, plus one rolling window before it, are
+    resampled again; earlier points are left as they are.
+    """
+    n_nights = span['nights']
+    first_new = to_dates(delta['Date']).min()
+    # Logged dates are already datetimes, so selecting the tail is a comparison rather than a parse
+    dates = df['Date'] if df['Date'].dtype == 'datetime64[ns]' else to_dates(df['Date'])
+    for name, freq in zip(("Sleep Patterns", "Trend Analysis"), frequencies):
+        fig = figures[name]
+        window = ROLLING_WINDOWS[freq]
+        since = period_start([first_new], freq)[0]
+        context = since - pd.DateOffset(**{f'{PERIOD_UNITS[freq]}s': window - 1})
+        tail = time_indexed(df.loc[(dates >= context).to_numpy()])
+        if name == "Sleep Patterns":
+            series = resample_metrics(tail, freq, columns=('Sleep_Duration', 'Sleep_Quality'), by='Gender',
+                                      groups=[trace.name for trace in fig.data])
+            new_traces = {trace.name: trace for trace in _pattern_traces(series[series['Date'] >= since])}
+            for trace in fig.data:
+                new = new_traces[trace.name]
+                _splice_trace(trace, since, x=new.x, y=new.y, customdata=new.customdata)
+            fig.update_layout(title_text=_series_title(PATTERNS_TITLE, freq, n_nights),
+                              meta=dict(frequency=freq, **span))
+        else:
+            _, series = trend(tail, freq=freq)
+            series = series[series['Date'] >= since]
+            for trace, new in zip(fig.data, _trend_traces(series, freq)):
+                columns = dict(x=new.x, y=new.y)
+                if new.customdata is not None:
+                    columns['customdata'] = new.customdata
+                _splice_trace(trace, since, **columns)
+            fig.update_layout(title_text=_series_title(TREND_TITLE, freq, n_nights, window),
+                              meta=dict(frequency=freq, **span))
+
+
+def extend_visualizations(figures, delta, df, budgets=None, cube=None):
+    """Add the newly appended rows ``delta`` (already included in ``df``) to figures from ``create_visualizations``
+
+    Scatter and sunburst traces are extended with the new rows only, the
+    resampled time series are recomputed from the first period the new rows
+    touch, and the Overview boxes are updated from ``cube`` and the new rows,
+    falling back to a pass over ``df`` when a whisker leaves its new Tukey
+    bounds. Returns False
+    and leaves the figures untouched when they cannot be extended in place:
+    a chart would need sampling, binning or a coarser frequency at the new
+    size, or a new group would need a trace of its own.
+    """
+    budgets = {**DEFAULT_POINT_BUDGETS, **(budgets or {})}
+    total_rows = len(df)
+    if any(total_rows > budgets[name] for name in ("Impact Analysis", "3D Factors")):
+        return False
+
+    impact = figures["Impact Analysis"]
+    years = delta['University_Year'].astype('string').fillna('nan')
+    impact_traces = {trace.name: trace for trace in impact.data}
+    if not set(years) <= set(impact_traces):
+        return False
+    plan = None
+    if has_dates(delta):
+        plan = _time_series_plan(figures, delta, budgets)
+        if plan is None:
+            return False
+
+    for year, rows in delta.groupby(years, sort=False):
+        _extend_trace(impact_traces[year], x=rows['Study_Hours'], y=rows['Sleep_Quality'],
+                      marker_size=rows['Sleep_Duration'], hovertext=rows['Gender'].astype(object))
+    _grow_sizeref(impact, delta['Sleep_Duration'], IMPACT_SIZE_MAX)
+    impact.update_layout(title_text=_coverage_title(IMPACT_TITLE, total_rows, total_rows))
+
+    factors = figures["3D Factors"]
+    _extend_trace(factors.data[0], x=delta['Screen_Time'], y=delta['Physical_Activity'], z=delta['Sleep_Duration'],
+                  marker_color=delta['Caffeine_Intake'], marker_size=delta['Sleep_Quality'])
+    _grow_sizeref(factors, delta['Sleep_Quality'], BUBBLE_SIZE_MAX)
+    factors.update_layout(title_text=_coverage_title(FACTORS_TITLE, total_rows, total_rows))
+
+    if plan is not None:
+        _extend_time_series(figures, delta, df, *plan)
+
+    sunburst = figures["Sleep Cycles"].data[0]
+    stage_totals = delta[list(sunburst.labels)].sum()
+    sunburst.values = np.asarray(sunburst.values, dtype=np.float64) + stage_totals.to_numpy(dtype=np.float64)
+
+    overview = figures["Overview"]
+    updated = _extend_overview(overview, delta, cube, budgets["Overview"]) if cube is not None else None
+    if updated is None:
+        updated = _overview_figure(df, cube, budgets["Overview"])
+    overview.data = []
+    overview.add_traces(updated.data)
+    overview.update_layout(meta=updated.layout.meta)
+    return True
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+
+DEFAULT_MODEL = os.getenv('SLEEP_CHAT_MODEL', 'llama-3.3-70b-versatile')
+DEFAULT_BACKEND = os.getenv('SLEEP_CHAT_BACKEND', 'groq')
+
+
+class ChatBackend(ABC):
+    """Interface for chat completion providers
+
+    Subclasses implement ``stream`` and ``astream``, yielding the response
+    text chunk by chunk as it is generated.
+    """
+
+    @abstractmethod
+    def stream(self, messages):
+        """Yield the response text chunk by chunk"""
+
+    @abstractmethod
+    def astream(self, messages):
+        """Async iterator over the response text chunks"""
+
+    def complete(self, messages):
+        return ''.join(self.stream(messages))
+
+    async def acomplete(self, messages):
+        return ''.join([chunk async for chunk in self.astream(messages)])
+
+
+class GroqBackend(ChatBackend):
+    """Streaming chat completions from the Groq API
+
+    ``base_url`` (or the ``GROQ_BASE_URL`` environment variable, read by the
+    SDK) points the client at any OpenAI-compatible server, such as a local
+    fake for testing.
+    """
+
+    def __init__(self, api_key=None, base_url=None, model=DEFAULT_MODEL, temperature=0.7, max_tokens=8000):
+        from groq import Groq
+
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.client = Groq(api_key=api_key, base_url=base_url)
+        self._async_client = None
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from groq import AsyncGroq
+            self._async_client = AsyncGroq(api_key=self.api_key, base_url=self.base_url)
+        return self._async_client
+
+    def _request(self, messages):
+        return dict(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True
+        )
+
+    def stream(self, messages):
+        for chunk in self.client.chat.completions.create(**self._request(messages)):
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
+    async def astream(self, messages):
+        response = await self.async_client.chat.completions.create(**self._request(messages))
+        async for chunk in response:
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
+
+def _chunk_text(chunk):
+    return chunk.choices[0].delta.content if chunk.choices else None
+
+
+BACKENDS = {
+    'groq': GroqBackend
+}
+
+
+def create_backend(name=None, **kwargs):
+    """Instantiate a registered backend by name (``SLEEP_CHAT_BACKEND`` by default)"""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown chat backend '{name}'. Available: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](**kwargs)
+
+
+class TimedStream:
+    """Wrap a chunk iterator, recording time-to-first-token and total response time"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.ttft = None
+        self.seconds = None
+
+    def __iter__(self):
+        start = time.perf_counter()
+        for chunk in self.chunks:
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - start
+            yield chunk
+        self.seconds = time.perf_counter() - start
+
+
+async def gather_completions(backend, conversations, concurrency=4):
+    """Run several conversations concurrently, at most ``concurrency`` in flight
+
+    Returns the response texts in the order of ``conversations``.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def complete(messages):
+        async with semaphore:
+            return await backend.acomplete(messages)
+
+    return await asyncio.gather(*(complete(messages) for messages in conversations))
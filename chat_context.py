@@ -0,0 +1,97 @@
+import math
+import os
+from dataclasses import dataclass, field
+
+from sleep_analyzer import SleepAnalyzer
+
+# Rough characters-per-token ratio of English text for LLaMA-style tokenizers
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = int(os.getenv('SLEEP_CHAT_CONTEXT_TOKENS', 400))
+NO_DATA_TEXT = "No sleep dataset has been analyzed yet."
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _label(column):
+    return column.replace('_', ' ')
+
+
+@dataclass(frozen=True)
+class ChatContext:
+    """Prompt-ready dataset summary as titled sections of lines, most important first"""
+    sections: list = field(default_factory=list)
+
+    def render(self, token_budget=DEFAULT_TOKEN_BUDGET):
+        """Render sections line by line in priority order until ``token_budget`` is spent"""
+        lines = []
+        used = 0
+        for title, section_lines in self.sections:
+            header = f"{title}:"
+            # A header is only worth its tokens together with its first line
+            for index, line in enumerate(section_lines):
+                text = f"- {line}"
+                cost = estimate_tokens(text) + (estimate_tokens(header) if index == 0 else 0)
+                if used + cost > token_budget:
+                    return '\n'.join(lines) if lines else NO_DATA_TEXT
+                if index == 0:
+                    lines.append(header)
+                lines.append(text)
+                used += cost
+        return '\n'.join(lines) if lines else NO_DATA_TEXT
+
+
+def build_chat_context(df=None, analysis_results=None, analyzer=None):
+    """Summarize a dataset and its analysis for the chat system prompt
+
+    Covers the headline scores, anomaly count, strongest correlations and
+    per-column statistics. Meant to be built once per dataset fingerprint
+    and rendered under a token budget for every message.
+    """
+    results = analysis_results or {}
+    sections = []
+
+    summary = []
+    if df is not None:
+        summary.append(f"Dataset: {len(df):,} records")
+    if 'avg_duration' in results:
+        summary.append(f"Average Sleep Duration: {results['avg_duration']:.1f} hours")
+    if 'quality_score' in results:
+        summary.append(f"Sleep Quality Score: {results['quality_score']:.1f}/10")
+    if 'consistency_score' in results:
+        summary.append(f"Sleep Consistency Score: {results['consistency_score']:.1f}/10")
+    if results.get('social_jetlag') is not None:
+        summary.append(f"Average Social Jetlag: {results['social_jetlag']:.0f} minutes")
+    if 'anomaly_count' in results:
+        summary.append(f"Unusual sleep records flagged: {results['anomaly_count']:,}")
+    if summary:
+        sections.append(("Summary", summary))
+
+    if df is None or df.empty:
+        return ChatContext(sections)
+
+    stats = (analyzer or SleepAnalyzer()).compute_stats(df)
+
+    if stats.correlations is not None:
+        correlations = [
+            f"{_label(a)} vs {_label(b)}: r={pair['pearson']:+.2f} (rank {pair['spearman']:+.2f})"
+            for pair in stats.correlations.top(n=5)
+            for a, b in [pair['columns']]
+        ]
+        if correlations:
+            sections.append(("Strongest correlations", correlations))
+
+    columns = []
+    for column_stats in stats.stats.values():
+        if not column_stats.count:
+            continue
+        columns.append(
+            f"{_label(column_stats.column)}: mean {column_stats.mean:.1f}, sd {column_stats.std:.1f}, "
+            f"median {column_stats.quantile(0.5):.1f}, IQR {column_stats.quantile(0.25):.1f}-"
+            f"{column_stats.quantile(0.75):.1f}, range {column_stats.min:.1f}-{column_stats.max:.1f}"
+        )
+    if columns:
+        sections.append(("Column statistics", columns))
+
+    return ChatContext(sections)
@@ -0,0 +1,103 @@
+import os
+import re
+
+from chat_context import estimate_tokens
+
+DEFAULT_WINDOW_TOKENS = int(os.getenv('SLEEP_CHAT_WINDOW_TOKENS', 1500))
+DEFAULT_SUMMARY_TOKENS = int(os.getenv('SLEEP_CHAT_SUMMARY_TOKENS', 300))
+DEFAULT_MAX_MESSAGES = 200
+SUMMARY_SNIPPET_CHARS = 160
+
+
+def first_sentence(text, max_chars=SUMMARY_SNIPPET_CHARS):
+    """First sentence of ``text`` with markdown noise removed, truncated to ``max_chars``"""
+    text = re.sub(r'[#*_`>]+', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    match = re.match(r'(.+?[.!?])(\s|$)', text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars - 1].rstrip() + '…'
+
+
+class ChatHistory:
+    """Chat transcript with a bounded prompt window and a rolling summary of older turns
+
+    Recent messages are sent verbatim up to ``window_tokens``. Messages that
+    fall out of the window are folded, once each, into an extractive summary
+    of their first sentences, trimmed oldest-first to ``summary_tokens``. The
+    transcript itself keeps at most ``max_messages`` for display.
+    """
+
+    def __init__(self, window_tokens=DEFAULT_WINDOW_TOKENS, summary_tokens=DEFAULT_SUMMARY_TOKENS,
+                 max_messages=DEFAULT_MAX_MESSAGES, greeting=None):
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.max_messages = max_messages
+        self.messages = []
+        self.summary_lines = []
+        self._summarized = 0
+        if greeting:
+            self.messages.append({"role": "assistant", "content": greeting, "greeting": True})
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, message):
+        self.messages.append(message)
+        overflow = len(self.messages) - self.max_messages
+        if overflow > 0:
+            self._fold(overflow)
+            del self.messages[:overflow]
+            self._summarized -= overflow
+
+    def user_turns(self):
+        return sum(1 for message in self.messages if message["role"] == "user")
+
+    def window(self):
+        """Most recent messages that fit in ``window_tokens``, oldest first
+
+        Always includes the latest message. Anything older than the window
+        is folded into the summary.
+        """
+        start = len(self.messages)
+        used = 0
+        while start > 0:
+            message = self.messages[start - 1]
+            cost = estimate_tokens(message["content"])
+            if used + cost > self.window_tokens and start < len(self.messages):
+                break
+            used += cost
+            start -= 1
+        self._fold(start)
+        return [
+            {"role": message["role"], "content": message["content"]}
+            for message in self.messages[start:]
+            if not message.get("greeting")
+        ]
+
+    def summary(self):
+        return '\n'.join(self.summary_lines)
+
+    def prompt_messages(self, system_prompt):
+        """System prompt (with the rolling summary when there is one) followed by the window"""
+        window = self.window()
+        if self.summary_lines:
+            system_prompt = f"{system_prompt}\nEarlier in this conversation:\n{self.summary()}"
+        return [{"role": "system", "content": system_prompt}] + window
+
+    def visible(self, limit):
+        """The last ``limit`` messages and how many earlier ones are hidden"""
+        hidden = max(0, len(self.messages) - limit)
+        return self.messages[hidden:], hidden
+
+    def _fold(self, end):
+        """Add messages ``[_summarized, end)`` to the summary"""
+        for message in self.messages[self._summarized:end]:
+            if message.get("greeting"):
+                continue
+            speaker = "User asked" if message["role"] == "user" else "You answered"
+            self.summary_lines.append(f"- {speaker}: {first_sentence(message['content'])}")
+        self._summarized = max(self._summarized, end)
+
+        used = sum(estimate_tokens(line) for line in self.summary_lines)
+        while self.summary_lines and used > self.summary_tokens:
+            used -= estimate_tokens(self.summary_lines.pop(0))
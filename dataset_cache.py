@@ -0,0 +1,121 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow ships with streamlit, but keep the cache optional
+    pa = feather = None
+
+# Bump when the parsing or enrichment of cached datasets changes
+CACHE_VERSION = '4'
+DEFAULT_CACHE_DIR = os.getenv('SLEEP_CACHE_DIR', os.path.join('.cache', 'datasets'))
+DEFAULT_MAX_BYTES = int(os.getenv('SLEEP_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+
+class DatasetCache:
+    """Content-addressed on-disk cache of parsed and enriched datasets
+
+    Datasets are written once as uncompressed Feather (Arrow IPC) files and
+    memory-mapped on later loads. The directory is kept under ``max_bytes``
+    by evicting the least recently used files.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return feather is not None
+
+    @staticmethod
+    def content_key(data):
+        """Hash raw file contents into a cache key"""
+        digest = hashlib.blake2b(CACHE_VERSION.encode(), digest_size=16)
+        digest.update(data)
+        return digest.hexdigest()
+
+    def load(self, data, parse, enrich=None, key=None):
+        """Return the enriched DataFrame for raw file bytes, parsing only on a cache miss
+
+        ``parse(data)`` turns the bytes into a DataFrame and ``enrich(df)``
+        adds derived columns; both run only when the key is not cached.
+        """
+        if not self.enabled:
+            return self._build(data, parse, enrich)
+
+        key = key or self.content_key(data)
+        path = self._path(key)
+        df = self._read(path)
+        if df is not None:
+            self.hits += 1
+            return df
+
+        self.misses += 1
+        df = self._build(data, parse, enrich)
+        self._write(df, path)
+        self._evict()
+        return df
+
+    def clear(self):
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+
+    def size_bytes(self):
+        return sum(path.stat().st_size for path in self._entries())
+
+    def _build(self, data, parse, enrich):
+        df = parse(data)
+        if enrich is not None:
+            df = enrich(df)
+        return df
+
+    def _path(self, key):
+        return self.cache_dir / f'{key}.feather'
+
+    def _entries(self):
+        if not self.cache_dir.is_dir():
+            return []
+        return list(self.cache_dir.glob('*.feather'))
+
+    def _read(self, path):
+        if not path.exists():
+            return None
+        try:
+            table = feather.read_table(path, memory_map=True)
+            os.utime(path)  # mark as recently used for LRU eviction
+            return table.to_pandas(split_blocks=True)
+        except (OSError, pa.ArrowException):
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write(self, df, path):
+        tmp_path = path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            feather.write_feather(df, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+        except (OSError, ValueError, pa.ArrowException):
+            # Caching is best effort; unsupported column types just skip it
+            tmp_path.unlink(missing_ok=True)
+
+    def _evict(self):
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
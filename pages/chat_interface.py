@@ -1,46 +1,71 @@
 import streamlit as st
+import html
 import os
-from groq import Groq
 import json
 from datetime import datetime
-from style import load_css
+from caching import LRUCache, dataframe_fingerprint
+from chat_backend import TimedStream, create_backend
+from chat_context import build_chat_context
+from chat_history import ChatHistory
+from response_cache import ResponseCache
+from style import alert_card, load_css, render_html
+
+# Messages rendered on each rerun; older ones stay behind a toggle
+VISIBLE_MESSAGES = 30
 
 def init_chat_history():
-    if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Hi! I'm your AI Sleep Expert. How can I help you today?"}
-        ]
+    if "chat_history" not in st.session_state:
+        st.session_state.chat_history = ChatHistory(
+            greeting="Hi! I'm your AI Sleep Expert. How can I help you today?"
+        )
 
-def get_chatbot_response(client, message, analysis_context):
+def build_system_prompt(context_text):
     system_prompt = f"""
     You are an AI Sleep Expert. Your role is to analyze sleep data and provide personalized advice.
 
     Here is the user's sleep analysis summary:
-    - Average Sleep Duration: {analysis_context['avg_duration']:.1f} hours
-    - Sleep Quality Score: {analysis_context['quality_score']:.1f}/10
-    - Sleep Consistency Score: {analysis_context['consistency_score']:.1f}/10
+{context_text}
     
     Use this data to answer the user's questions and provide specific, actionable recommendations.
     Be friendly, empathetic, and encouraging.
     """
-    
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": message}
-    ]
-
-    completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=messages,
-        temperature=0.7,
-        max_tokens=8000
+    return system_prompt
+
+@st.cache_resource
+def get_context_cache():
+    """Chat contexts keyed by dataset fingerprint, so each dataset is summarized once"""
+    return LRUCache(maxsize=8)
+
+def get_chat_context():
+    analysis_results = st.session_state.get('analysis_results', {})
+    df = st.session_state.get('df')
+    if df is None:
+        return build_chat_context(analysis_results=analysis_results)
+    fingerprint = st.session_state.get('fingerprint') or dataframe_fingerprint(df)
+    return get_context_cache().get_or_compute(
+        ('chat_context', fingerprint),
+        lambda: build_chat_context(df, analysis_results)
     )
-    return completion.choices[0].message.content
+
+@st.cache_resource
+def get_backend(api_key):
+    # One backend per key so its HTTP connection pool is reused across reruns
+    return create_backend(api_key=api_key)
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+def render_timing(msg):
+    if msg.get("cached"):
+        st.caption("⚡ Served from the response cache")
+    elif msg.get("ttft") is not None:
+        st.caption(f"⚡ First token in {msg['ttft']:.2f}s · full response in {msg['seconds']:.2f}s")
 
 load_css('style.css')
 
 # Enhanced Header
-st.markdown("""
+render_html("""
 <div style="text-align: center; margin-bottom: 3rem;">
     <div style="position: relative; display: inline-block;">
         <h1 style="margin-bottom: 0.5rem; position: relative; z-index: 2;">💬 AI Sleep Expert Chat</h1>
@@ -66,12 +91,12 @@ st.markdown("""
         </div>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 init_chat_history()
 
 # Enhanced Welcome Section
-st.markdown("""
+render_html("""
 <div class="chat-container">
     <div class="chat-welcome">
         <h2>🌟 Welcome to the Sleep Expert Chat!</h2>
@@ -94,101 +119,43 @@ st.markdown("""
         </div>
     </div>
 </div>
-""", unsafe_allow_html=True)
+""")
 
 
 api_key = os.getenv("GROQ_API_KEY")
 if not api_key:
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, rgba(239, 68, 68, 0.15), rgba(220, 38, 38, 0.1)); 
-                border: 1px solid rgba(239, 68, 68, 0.4); 
-                border-radius: 16px; 
-                padding: 2rem; 
-                margin-bottom: 2rem;
-                backdrop-filter: blur(20px);
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.2);
-                position: relative;
-                overflow: hidden;">
-        <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px; 
-                    background: linear-gradient(90deg, #EF4444, #F87171, #FCA5A5);"></div>
-        <div style="display: flex; align-items: center; gap: 16px;">
-            <div style="background: linear-gradient(135deg, #EF4444, #F87171); 
-                        border-radius: 50%; width: 60px; height: 60px; 
-                        display: flex; align-items: center; justify-content: center;
-                        box-shadow: 0 4px 16px rgba(239, 68, 68, 0.3);">
-                <span style="font-size: 1.8rem;">⚠️</span>
-            </div>
-            <div style="flex: 1;">
-                <strong style="color: #EF4444; font-size: 1.2rem; display: block; margin-bottom: 0.5rem;">
-                    🔑 API Key Required
-                </strong>
-                <p style="margin: 0; color: #E5E7EB; line-height: 1.6; font-size: 1rem;">
-                    Please set the GROQ_API_KEY environment variable to use the AI chat feature. 
-                    This enables personalized sleep advice and insights.
-                </p>
-                <div style="margin-top: 1rem; display: flex; gap: 0.5rem; flex-wrap: wrap;">
-                    <span style="background: rgba(239, 68, 68, 0.2); border-radius: 8px; padding: 0.3rem 0.8rem; 
-                               font-size: 0.9rem; color: #E5E7EB;">🔧 Setup Required</span>
-                    <span style="background: rgba(239, 68, 68, 0.2); border-radius: 8px; padding: 0.3rem 0.8rem; 
-                               font-size: 0.9rem; color: #E5E7EB;">🤖 AI Features</span>
-                </div>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(alert_card(
+        "⚠️", "🔑 API Key Required",
+        ("Please set the GROQ_API_KEY environment variable to use the AI chat feature. "
+         "This enables personalized sleep advice and insights.",),
+        tags=("🔧 Setup Required", "🤖 AI Features")
+    ), unsafe_allow_html=True)
     st.stop()
 else:
     try:
-        client = Groq(api_key=api_key)
+        backend = get_backend(api_key)
+        response_cache = get_response_cache()
     except Exception as e:
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, rgba(239, 68, 68, 0.15), rgba(220, 38, 38, 0.1)); 
-                    border: 1px solid rgba(239, 68, 68, 0.4); 
-                    border-radius: 16px; 
-                    padding: 2rem; 
-                    margin-bottom: 2rem;
-                    backdrop-filter: blur(20px);
-                    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.2);
-                    position: relative;
-                    overflow: hidden;">
-            <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px; 
-                        background: linear-gradient(90deg, #EF4444, #F87171, #FCA5A5);"></div>
-            <div style="display: flex; align-items: center; gap: 16px;">
-                <div style="background: linear-gradient(135deg, #EF4444, #F87171); 
-                            border-radius: 50%; width: 60px; height: 60px; 
-                            display: flex; align-items: center; justify-content: center;
-                            box-shadow: 0 4px 16px rgba(239, 68, 68, 0.3);">
-                    <span style="font-size: 1.8rem;">❌</span>
-                </div>
-                <div style="flex: 1;">
-                    <strong style="color: #EF4444; font-size: 1.2rem; display: block; margin-bottom: 0.5rem;">
-                        🔌 Connection Error
-                    </strong>
-                    <p style="margin: 0; color: #E5E7EB; line-height: 1.6; font-size: 1rem;">
-                        Failed to initialize Groq client: {str(e)}
-                    </p>
-                    <p style="margin: 0.5rem 0 0 0; color: #E5E7EB; line-height: 1.6; font-size: 1rem;">
-                        Please check your GROQ_API_KEY and try again.
-                    </p>
-                    <div style="margin-top: 1rem; display: flex; gap: 0.5rem; flex-wrap: wrap;">
-                        <span style="background: rgba(239, 68, 68, 0.2); border-radius: 8px; padding: 0.3rem 0.8rem; 
-                                   font-size: 0.9rem; color: #E5E7EB;">🔧 Check API Key</span>
-                        <span style="background: rgba(239, 68, 68, 0.2); border-radius: 8px; padding: 0.3rem 0.8rem; 
-                                   font-size: 0.9rem; color: #E5E7EB;">🔄 Retry Connection</span>
-                    </div>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(alert_card(
+            "❌", "🔌 Connection Error",
+            (f"Failed to initialize chat backend: {html.escape(str(e))}",
+             "Please check your GROQ_API_KEY and try again."),
+            tags=("🔧 Check API Key", "🔄 Retry Connection")
+        ), unsafe_allow_html=True)
         st.stop()
 
-    # Display chat messages
-    for msg in st.session_state.messages:
+    # Display only the tail of long conversations so reruns stay cheap
+    chat_history = st.session_state.chat_history
+    visible, hidden = chat_history.visible(VISIBLE_MESSAGES)
+    if hidden and st.toggle(f"Show {hidden} earlier messages"):
+        visible = chat_history.messages
+    for msg in visible:
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
+            render_timing(msg)
 
     # Enhanced Chat Input
-    st.markdown("""
+    render_html("""
     <div style="margin: 3rem 0;">
         <div style="background: linear-gradient(135deg, rgba(75, 156, 211, 0.15), rgba(96, 165, 250, 0.1)); 
                     border: 1px solid rgba(75, 156, 211, 0.4); 
@@ -210,21 +177,36 @@ else:
             </p>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
     
     if prompt := st.chat_input("Type your question here..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        chat_history.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        with st.spinner("🤔 Analyzing your sleep data and thinking..."):
-            with st.chat_message("assistant"):
-                analysis_context = st.session_state.get('analysis_results', {})
-                df = st.session_state.get('df')
-                
-                if df is not None:
-                    analysis_context['df_summary'] = df.describe().to_string()
-                
-                response = get_chatbot_response(client, prompt, analysis_context)
+        with st.chat_message("assistant"):
+            context_text = get_chat_context().render()
+            # Follow-up answers depend on the conversation, so only opening questions are cached
+            first_turn = chat_history.user_turns() == 1
+            cache_key = ResponseCache.make_key(prompt, {'context': context_text}, model=getattr(backend, 'model', None))
+            response = response_cache.get(cache_key) if first_turn else None
+            if response is not None:
                 st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+                message = {"role": "assistant", "content": response, "cached": True}
+            else:
+                # Render tokens as they arrive instead of waiting for the full completion
+                messages = chat_history.prompt_messages(build_system_prompt(context_text))
+                stream = TimedStream(backend.stream(messages))
+                response = st.write_stream(stream)
+                if first_turn:
+                    response_cache.put(cache_key, response)
+                message = {"role": "assistant", "content": response, "ttft": stream.ttft, "seconds": stream.seconds}
+            render_timing(message)
+            chat_history.append(message)
+
+    if os.getenv("DEBUG") == "true":
+        cache_stats = response_cache.stats()
+        st.sidebar.caption(
+            f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['size']} entries)"
+        )
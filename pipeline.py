@@ -0,0 +1,139 @@
+"""Headless sleep analysis pipeline shared by the dashboard and batch jobs
+
+Runs the same steps as the dashboard (sleep stage and timing enrichment,
+analysis, recommendations and anomaly detection) without importing
+Streamlit:
+
+    python -m pipeline student_sleep_patterns.csv
+    cat export.csv | python -m pipeline - -o results.json
+    python -m pipeline a.csv b.csv -o enriched.parquet
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from sleep_analyzer import SleepAnalyzer, derive_sleep_stages
+from sleep_data import load_sleep_csv
+from sleep_timing import add_timing_features
+
+
+def enrich_dataset(df):
+    """Add the derived sleep stage and sleep timing columns in place"""
+    derive_sleep_stages(df)
+    add_timing_features(df)
+    return df
+
+
+def get_recommendations(analysis_results):
+    recommendations = []
+    if analysis_results['avg_duration'] < 7:
+        recommendations.append("Consider increasing your sleep duration to at least 7 hours for better health.")
+    if analysis_results['quality_score'] < 6:
+        recommendations.append("Improve sleep quality by creating a restful environment and avoiding caffeine before bed.")
+    if analysis_results['consistency_score'] < 6:
+        recommendations.append("Try to maintain a consistent sleep schedule, even on weekends, to improve your circadian rhythm.")
+
+    if not recommendations:
+        recommendations.append("Your sleep patterns seem healthy. Keep up the good work!")
+
+    return recommendations
+
+
+@dataclass
+class PipelineResult:
+    """Enriched data with its analysis, recommendations and flagged anomalies"""
+    data: pd.DataFrame
+    analysis: dict
+    recommendations: list = field(default_factory=list)
+    anomalies: object = None
+
+    @property
+    def anomaly_count(self):
+        return len(self.anomalies) if self.anomalies is not None else 0
+
+    def summary(self):
+        """JSON-serializable results without the row-level data"""
+        return {
+            'rows': len(self.data),
+            'analysis': self.analysis,
+            'recommendations': self.recommendations,
+            'anomaly_count': self.anomaly_count
+        }
+
+    def rows(self):
+        """The enriched rows with Anomaly and Anomaly_Score columns"""
+        data = self.data.copy()
+        data['Anomaly'] = False
+        data['Anomaly_Score'] = float('nan')
+        if self.anomaly_count:
+            data.loc[self.anomalies.indices, 'Anomaly'] = True
+            data.loc[self.anomalies.indices, 'Anomaly_Score'] = self.anomalies.scores
+        return data
+
+
+def run_pipeline(df, analyzer=None, detect_anomalies=True, fingerprint=None):
+    """Enrich ``df`` in place and analyze it the way the dashboard does"""
+    analyzer = analyzer or SleepAnalyzer()
+    enrich_dataset(df)
+    analysis = analyzer.analyze(df)
+    anomalies = analyzer.detect_anomalies(df, fingerprint=fingerprint) if detect_anomalies else None
+    return PipelineResult(
+        data=df,
+        analysis=analysis,
+        recommendations=get_recommendations(analysis),
+        anomalies=anomalies
+    )
+
+
+def analyze_file(source, analyzer=None, detect_anomalies=True):
+    """Load a sleep CSV (path, file object or ``'-'`` for stdin) and run the pipeline on it"""
+    source = sys.stdin if source == '-' else source
+    return run_pipeline(load_sleep_csv(source), analyzer=analyzer, detect_anomalies=detect_anomalies)
+
+
+def _output_format(path, requested):
+    if requested:
+        return requested
+    return 'parquet' if path and Path(path).suffix in ('.parquet', '.pq') else 'json'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='sleep-analysis', description="Analyze sleep CSV files without the dashboard")
+    parser.add_argument('inputs', nargs='*', default=['-'], help="CSV files to analyze ('-' or none for stdin)")
+    parser.add_argument('-o', '--output', help="Output file (default: JSON summary on stdout)")
+    parser.add_argument('--format', choices=['json', 'parquet'], default=None,
+                        help="json writes the summary, parquet the enriched rows (default: from --output suffix)")
+    parser.add_argument('--no-anomalies', action='store_true', help="Skip isolation forest anomaly detection")
+    args = parser.parse_args(argv)
+
+    fmt = _output_format(args.output, args.format)
+    if fmt == 'parquet' and not args.output:
+        parser.error("--format parquet requires --output")
+
+    analyzer = SleepAnalyzer()
+    results = {}
+    for source in args.inputs:
+        name = '<stdin>' if source == '-' else source
+        results[name] = analyze_file(source, analyzer=analyzer, detect_anomalies=not args.no_anomalies)
+
+    if fmt == 'parquet':
+        frames = [result.rows().assign(Source=name) for name, result in results.items()]
+        pd.concat(frames, ignore_index=True).to_parquet(args.output, index=False)
+        return 0
+
+    summaries = {name: result.summary() for name, result in results.items()}
+    output = next(iter(summaries.values())) if len(summaries) == 1 else summaries
+    text = json.dumps(output, indent=2, default=float) + '\n'
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from numbers import Number
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = os.getenv('SLEEP_CHAT_CACHE_PATH', os.path.join('.cache', 'chat_responses.sqlite3'))
+DEFAULT_TTL = float(os.getenv('SLEEP_CHAT_CACHE_TTL', 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv('SLEEP_CHAT_CACHE_MAX_ENTRIES', 10_000))
+# Decimal places kept for numeric context values, so small analysis jitter still hits
+CONTEXT_PRECISION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def normalize_prompt(prompt):
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r'\s+', ' ', prompt).strip().lower().rstrip('?!. ')
+
+
+def normalize_context(context):
+    """Round numeric values so near-identical analyses share cache entries"""
+    normalized = {}
+    for key, value in sorted((context or {}).items()):
+        if isinstance(value, bool) or not isinstance(value, Number):
+            normalized[key] = value if isinstance(value, (str, bool, type(None))) else repr(value)
+        else:
+            normalized[key] = round(float(value), CONTEXT_PRECISION)
+    return normalized
+
+
+class ResponseCache:
+    """Persistent SQLite cache of chat responses keyed by prompt and analysis context
+
+    Entries expire after ``ttl`` seconds and the table is kept under
+    ``max_entries`` by evicting the least recently used rows. Hit and miss
+    counts are stored alongside the responses so they survive restarts.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def make_key(prompt, context=None, model=None):
+        payload = json.dumps(
+            {'prompt': normalize_prompt(prompt), 'context': normalize_context(context), 'model': model},
+            sort_keys=True, default=repr
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for ``key``, or None when missing or expired"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT response, created FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self._increment('misses')
+                return None
+            self._conn.execute('UPDATE responses SET accessed = ?, hits = hits + 1 WHERE key = ?', (now, key))
+            self._increment('hits')
+            return row[0]
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)',
+                (key, response, now, now)
+            )
+            self._evict(now)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.execute('DELETE FROM stats')
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute('SELECT name, value FROM stats'))
+            size = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        hits, misses = counts.get('hits', 0), counts.get('misses', 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'size': size,
+            'max_entries': self.max_entries,
+            'hit_rate': hits / total if total else 0.0
+        }
+
+    def _increment(self, name):
+        self._conn.execute(
+            'INSERT INTO stats (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,)
+        )
+
+    def _evict(self, now):
+        self._conn.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl,))
+        self._conn.execute(
+            'DELETE FROM responses WHERE key IN ('
+            'SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='response_cache', description="Inspect the chat response cache")
+    parser.add_argument('--path', default=DEFAULT_CACHE_PATH, help="Cache database file")
+    parser.add_argument('--clear', action='store_true', help="Delete all cached responses and counters")
+    args = parser.parse_args(argv)
+
+    cache = ResponseCache(args.path)
+    if args.clear:
+        cache.clear()
+    json.dump(cache.stats(), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,100 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import IsolationForest
+import pandas as pd
 import traceback
+from caching import LRUCache, dataframe_fingerprint
+from sleep_timing import timing_features
+from sleep_stats import CorrelationAccumulator, SleepStats, StatsAccumulator, column_matrix, compute_column_stats
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+# Sleep quality bins and the share of the night spent in each stage per bin
+QUALITY_BINS = [0, 5, 8, 11]
+QUALITY_LABELS = ['Poor', 'Good', 'Excellent']
+SLEEP_STAGES = ['Awake', 'Light', 'Deep', 'REM']
+STAGE_PERCENTAGES = {
+    'Poor': {'Awake': 0.20, 'Light': 0.55, 'Deep': 0.15, 'REM': 0.10},
+    'Good': {'Awake': 0.10, 'Light': 0.50, 'Deep': 0.20, 'REM': 0.20},
+    'Excellent': {'Awake': 0.05, 'Light': 0.45, 'Deep': 0.25, 'REM': 0.25}
+}
+
+# One row per quality label; the trailing NaN row is selected by the -1 code
+# pandas assigns to missing or out-of-bin qualities
+_STAGE_MATRIX = np.array(
+    [[STAGE_PERCENTAGES[label][stage] for stage in SLEEP_STAGES] for label in QUALITY_LABELS]
+    + [[np.nan] * len(SLEEP_STAGES)]
+)
+
+
+def derive_sleep_stages(df):
+    """Add Quality_Category and the per-stage sleep hours to ``df`` in place"""
+    quality = pd.to_numeric(df['Sleep_Quality'], errors='coerce')
+    df['Quality_Category'] = pd.cut(quality, bins=QUALITY_BINS, labels=QUALITY_LABELS, right=False)
+    codes = df['Quality_Category'].cat.codes.to_numpy()
+    duration = pd.to_numeric(df['Sleep_Duration'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    df[SLEEP_STAGES] = duration[:, None] * _STAGE_MATRIX[codes]
+    return df
+
+
+@dataclass(frozen=True)
+class AnomalyModel:
+    """Scaler and isolation forest fitted on a subsample of one dataset"""
+    columns: list
+    scaler: 'StandardScaler'
+    forest: 'IsolationForest'
+    n_fit_rows: int
+
+
+@dataclass(frozen=True)
+class AnomalyResult:
+    """Rows flagged as anomalous, with their isolation forest decision scores
+
+    Scores below zero are anomalous; lower is more unusual. Rows with missing
+    values are not scored.
+    """
+    indices: pd.Index
+    scores: np.ndarray
+    n_scored: int
+    columns: list
+
+    @classmethod
+    def empty(cls, columns=()):
+        return cls(indices=pd.Index([]), scores=np.array([]), n_scored=0, columns=list(columns))
+
+    def __len__(self):
+        return len(self.indices)
+
+    def to_frame(self, df):
+        """Flagged rows of ``df`` with an Anomaly_Score column, most unusual first"""
+        flagged = df.loc[self.indices].copy()
+        flagged['Anomaly_Score'] = self.scores
+        return flagged.sort_values('Anomaly_Score')
+
+
+# Fitted anomaly models shared by all analyzers, keyed by dataset fingerprint
+_ANOMALY_MODELS = LRUCache(maxsize=8)
+
 
 class SleepAnalyzer:
-    def __init__(self):
+    # Categories summarised by the statistics kernel
+    NUMERIC_CATEGORIES = ('sleep_duration', 'quality', 'study', 'screen', 'activity', 'caffeine',
+                          'social_jetlag', 'time_in_bed')
+    # Categories paired up for correlation insights; the timing features are left out because
+    # they are derived from the same sleep start/end times and correlate with each other by construction
+    CORRELATION_CATEGORIES = ('sleep_duration', 'quality', 'study', 'screen', 'activity', 'caffeine')
+
+    def __init__(self, anomaly_models=None):
+        self.anomaly_models = _ANOMALY_MODELS if anomaly_models is None else anomaly_models
+        self.anomaly_model = None
         # Define column mappings for flexibility
         self.column_mappings = {
             'sleep_duration': ['Sleep_Duration', 'duration', 'sleep_hours', 'hours'],
@@ -14,7 +104,10 @@ class SleepAnalyzer:
             'activity': ['Physical_Activity', 'exercise'],
             'caffeine': ['Caffeine_Intake', 'caffeine'],
             'gender': ['Gender', 'sex'],
-            'year': ['University_Year', 'year', 'academic_year']
+            'year': ['University_Year', 'year', 'academic_year'],
+            # Derived from the sleep start/end times by sleep_timing, in minutes
+            'social_jetlag': ['Social_Jetlag'],
+            'time_in_bed': ['Weekday_Time_In_Bed']
         }
 
     def _find_column(self, df, category):
@@ -25,83 +118,263 @@ class SleepAnalyzer:
                 return name
         return None
 
+    def _resolve_columns(self, df):
+        """Resolve every category to its column in the dataset in one lookup pass"""
+        columns = {}
+        for category in self.column_mappings:
+            column = self._find_column(df, category)
+            if column:
+                columns[category] = column
+        return columns
+
+    def _with_timing_features(self, df):
+        """Return ``df`` with the derived sleep timing columns, without mutating the input"""
+        if 'Social_Jetlag' in df.columns:
+            return df
+        features = timing_features(df)
+        if features.columns.empty:
+            return df
+        return pd.concat([df, features], axis=1)
+
+    def compute_stats(self, df):
+        """Compute statistics for all mapped numeric columns in a single vectorized pass"""
+        df = self._with_timing_features(df)
+        columns = self._resolve_columns(df)
+        numeric = [category for category in self.NUMERIC_CATEGORIES if category in columns]
+        names = [columns[category] for category in numeric]
+        matrix = column_matrix(df, names)
+        correlated = [j for j, category in enumerate(numeric) if category in self.CORRELATION_CATEGORIES]
+        correlations = CorrelationAccumulator([names[j] for j in correlated])
+        correlations.update_matrix(matrix[:, correlated])
+        return SleepStats(
+            n_rows=len(df),
+            columns=columns,
+            stats=dict(zip(numeric, compute_column_stats(matrix, names))),
+            correlations=correlations
+        )
+
+    def create_accumulator(self, df):
+        """Create a mergeable statistics accumulator for datasets shaped like ``df``"""
+        columns = self._resolve_columns(self._with_timing_features(df))
+        numeric = [category for category in self.NUMERIC_CATEGORIES if category in columns]
+        return StatsAccumulator(columns, numeric, correlated=self.CORRELATION_CATEGORIES)
+
     def analyze(self, df):
         try:
             # Validate input data
             if df is None or df.empty:
                 raise ValueError("No data provided for analysis")
 
-            duration_col = self._find_column(df, 'sleep_duration')
-            if not duration_col:
+            if not self._find_column(df, 'sleep_duration'):
                 raise ValueError("Sleep duration data not found in the provided dataset")
 
-            # Calculate basic statistics
             try:
-                avg_duration = df[duration_col].mean()
-                std_duration = df[duration_col].std()
+                stats = self.compute_stats(df)
             except Exception:
                 raise ValueError("Error calculating sleep statistics")
 
-            analysis_results = {
-                'avg_duration': avg_duration,
-                'consistency_score': max(0, 10 - (std_duration * 2)),
-                'recommendations': [],
-                'insights': []
-            }
+            return self._results_from_stats(stats)
 
-            # Quality score calculation
-            try:
-                quality_col = self._find_column(df, 'quality')
-                if quality_col:
-                    analysis_results['quality_score'] = df[quality_col].mean()
-                else:
-                    # If no quality column, calculate a score based on duration
-                    analysis_results['quality_score'] = self._calculate_quality_from_duration(df[duration_col].mean())
-            except Exception:
-                analysis_results['quality_score'] = 5.0  # Default score if calculation fails
+        except Exception as e:
+            return self._error_results(e)
 
-            # Generate recommendations with error handling
-            try:
-                analysis_results['recommendations'] = self._generate_recommendations(df, analysis_results)
-            except Exception:
-                analysis_results['recommendations'] = ["Maintain a consistent sleep schedule"]
+    def analyze_stream(self, chunks):
+        """Analyze an iterable of DataFrame chunks in constant memory
 
-            # Add insights with error handling
-            try:
-                self._add_additional_insights(df, analysis_results)
-            except Exception:
-                analysis_results['insights'] = ["Basic sleep analysis completed"]
+        Returns the same results dict as ``analyze``; moments are exact and
+        quantiles come from mergeable sketches.
+        """
+        try:
+            return self.analyze_accumulated(self.accumulate(chunks))
+        except Exception as e:
+            return self._error_results(e)
 
-            return analysis_results
+    def accumulate(self, chunks):
+        """Fold DataFrame chunks into a statistics accumulator, raising on unusable data"""
+        accumulator = None
+        for chunk in chunks:
+            chunk = self._with_timing_features(chunk)
+            if accumulator is None:
+                if not self._find_column(chunk, 'sleep_duration'):
+                    raise ValueError("Sleep duration data not found in the provided dataset")
+                accumulator = self.create_accumulator(chunk)
+            accumulator.update(chunk)
 
-        except Exception as e:
-            return {
-                'avg_duration': 0,
-                'quality_score': 0,
-                'consistency_score': 0,
-                'recommendations': [
-                    "Unable to analyze sleep data",
-                    "Please check your data format and try again"
-                ],
-                'insights': [f"Analysis Error: {str(e)}"]
-            }
-
-    def _add_additional_insights(self, df, results):
+        if accumulator is None or accumulator.n_rows == 0:
+            raise ValueError("No data provided for analysis")
+        return accumulator
+
+    def analyze_accumulated(self, accumulator):
+        """Build analysis results from a (possibly merged) statistics accumulator"""
+        return self._results_from_stats(accumulator.to_stats())
+
+    def fit_anomaly_model(self, df, max_samples=10_000, contamination=0.02, random_state=0, n_jobs=None, min_rows=1):
+        """Fit a scaler and isolation forest on at most ``max_samples`` complete rows
+
+        Returns None when fewer than ``min_rows`` rows have every feature.
+        """
+        # scikit-learn (and SciPy behind it) is imported on first use to keep cold starts fast
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+
+        df = self._with_timing_features(df)
+        columns = self._resolve_columns(df)
+        names = [columns[category] for category in self.NUMERIC_CATEGORIES if category in columns]
+        if not names:
+            raise ValueError("No numeric sleep or lifestyle columns found for anomaly detection")
+
+        matrix = column_matrix(df, names)
+        complete = matrix[~np.isnan(matrix).any(axis=1)]
+        if len(complete) < max(min_rows, 1):
+            return None
+        if len(complete) > max_samples:
+            rng = np.random.default_rng(random_state)
+            complete = complete[rng.choice(len(complete), size=max_samples, replace=False)]
+
+        scaler = StandardScaler().fit(complete)
+        forest = IsolationForest(
+            contamination=contamination,
+            random_state=random_state,
+            n_jobs=n_jobs
+        ).fit(scaler.transform(complete))
+        return AnomalyModel(columns=names, scaler=scaler, forest=forest, n_fit_rows=len(complete))
+
+    def detect_anomalies(self, df, max_samples=10_000, contamination=0.02, batch_size=50_000,
+                         n_jobs=-1, min_rows=10, fingerprint=None):
+        """Flag unusual rows over the numeric sleep and lifestyle columns
+
+        The model is fitted on a bounded subsample and cached per dataset
+        fingerprint, so repeated calls on unchanged data only score. The
+        fitted model is kept on ``self.anomaly_model`` for ``score_anomalies``.
+        """
+        if df is None or len(df) < min_rows:
+            return AnomalyResult.empty()
+
+        fingerprint = fingerprint or dataframe_fingerprint(df)
+        key = (fingerprint, max_samples, contamination, min_rows)
+        self.anomaly_model = self.anomaly_models.get_or_compute(
+            key, lambda: self.fit_anomaly_model(df, max_samples, contamination, n_jobs=n_jobs, min_rows=min_rows)
+        )
+        if self.anomaly_model is None:
+            # Too few rows have every feature to fit a model
+            return AnomalyResult.empty()
+        return self.score_anomalies(df, batch_size=batch_size, n_jobs=n_jobs)
+
+    def score_anomalies(self, df, model=None, batch_size=50_000, n_jobs=-1):
+        """Score rows against an already fitted model in parallel batches, without refitting"""
+        from joblib import Parallel, delayed
+
+        model = model or self.anomaly_model
+        if model is None:
+            raise ValueError("No anomaly model has been fitted")
+
+        matrix = column_matrix(self._with_timing_features(df), model.columns)
+        complete = ~np.isnan(matrix).any(axis=1)
+        if not complete.any():
+            return AnomalyResult.empty(model.columns)
+        scaled = model.scaler.transform(matrix[complete])
+        batches = [scaled[start:start + batch_size] for start in range(0, len(scaled), batch_size)]
+        batch_scores = Parallel(n_jobs=n_jobs, prefer='threads')(
+            delayed(model.forest.decision_function)(batch) for batch in batches
+        )
+
+        scores = np.full(len(df), np.nan)
+        if batch_scores:
+            scores[complete] = np.concatenate(batch_scores)
+        flagged = np.flatnonzero(scores < 0)
+        return AnomalyResult(
+            indices=df.index[flagged],
+            scores=scores[flagged],
+            n_scored=int(complete.sum()),
+            columns=list(model.columns)
+        )
+
+    def _error_results(self, error):
+        return {
+            'avg_duration': 0,
+            'quality_score': 0,
+            'consistency_score': 0,
+            'recommendations': [
+                "Unable to analyze sleep data",
+                "Please check your data format and try again"
+            ],
+            'insights': [f"Analysis Error: {str(error)}"]
+        }
+
+    def _results_from_stats(self, stats):
+        """Build the analysis results dict from precomputed statistics"""
+        duration = stats.get('sleep_duration')
+        analysis_results = {
+            'avg_duration': duration.mean,
+            'consistency_score': max(0, 10 - (duration.std * 2)),
+            'recommendations': [],
+            'insights': []
+        }
+
+        if 'social_jetlag' in stats:
+            analysis_results['social_jetlag'] = stats.mean('social_jetlag')
+        if 'time_in_bed' in stats:
+            analysis_results['avg_time_in_bed'] = stats.mean('time_in_bed') / 60
+
+        # Quality score calculation
+        try:
+            if 'quality' in stats:
+                analysis_results['quality_score'] = stats.mean('quality')
+            else:
+                # If no quality column, calculate a score based on duration
+                analysis_results['quality_score'] = self._calculate_quality_from_duration(duration.mean)
+        except Exception:
+            analysis_results['quality_score'] = 5.0  # Default score if calculation fails
+
+        # Generate recommendations with error handling
+        try:
+            analysis_results['recommendations'] = self._generate_recommendations(stats, analysis_results)
+        except Exception:
+            analysis_results['recommendations'] = ["Maintain a consistent sleep schedule"]
+
+        # Add insights with error handling
+        try:
+            self._add_additional_insights(stats, analysis_results)
+        except Exception:
+            analysis_results['insights'] = ["Basic sleep analysis completed"]
+
+        return analysis_results
+
+    def _add_additional_insights(self, stats, results):
         """Add more insights based on available data"""
         insights = []
         
-        if self._find_column(df, 'study') and self._find_column(df, 'screen'):
-            insights.append("Correlations between study, screen time, and sleep quality have been analyzed.")
+        if stats.correlations is not None:
+            top_correlations = stats.correlations.top()
+            results['top_correlations'] = top_correlations
+            for pair in top_correlations:
+                insights.append(self._describe_correlation(pair))
+            # Only report an absence of correlations when there were pairs to test
+            if not top_correlations and stats.correlations.count >= 3 and len(stats.correlations.columns) >= 2:
+                insights.append("No notable correlations were found between lifestyle factors and sleep.")
             
-        if self._find_column(df, 'activity'):
+        if 'activity' in stats:
             insights.append("The impact of physical activity on sleep patterns has been assessed.")
+
+        if 'social_jetlag' in stats and stats.get('social_jetlag').count:
+            insights.append(
+                f"Weekend sleep is shifted by {stats.mean('social_jetlag'):.0f} minutes on average "
+                "compared to weekdays (social jetlag)."
+            )
             
         results['insights'] = insights
 
-    def _generate_recommendations(self, df, results):
+    def _describe_correlation(self, pair):
+        first, second = (column.replace('_', ' ') for column in pair['columns'])
+        r = pair['pearson']
+        strength = 'strong' if abs(r) >= 0.5 else 'moderate' if abs(r) >= 0.3 else 'weak'
+        direction = 'positive' if r > 0 else 'negative'
+        return (f"{first} and {second} show a {strength} {direction} correlation "
+                f"(r = {r:+.2f}, rank correlation {pair['spearman']:+.2f}).")
+
+    def _generate_recommendations(self, stats, results):
         """Generate dynamic recommendations based on available data"""
         recommendations = []
-        duration_col = self._find_column(df, 'sleep_duration')
         
         # Basic sleep duration recommendations
         if results['avg_duration'] < 7:
@@ -110,18 +383,17 @@ class SleepAnalyzer:
             recommendations.append("Consider optimizing sleep duration to 7-9 hours")
 
         # Additional contextual recommendations
-        study_col = self._find_column(df, 'study')
-        screen_col = self._find_column(df, 'screen')
-        activity_col = self._find_column(df, 'activity')
-        
-        if study_col and df[study_col].mean() > 8:
+        if stats.mean('study') > 8:
             recommendations.append("Consider balancing study time with adequate rest")
         
-        if screen_col and df[screen_col].mean() > 4:
+        if stats.mean('screen') > 4:
             recommendations.append("Reduce screen time, especially before bedtime")
             
-        if activity_col and df[activity_col].mean() < 30:
+        if stats.mean('activity') < 30:
             recommendations.append("Increase physical activity for better sleep quality")
+
+        if stats.mean('social_jetlag') > 60:
+            recommendations.append("Keep weekend sleep times within an hour of your weekday schedule")
             
         return recommendations
 
@@ -132,3 +404,114 @@ class SleepAnalyzer:
             return 6.5
         else:
             return 4.5
+
+
+def _accumulate_file(path, chunksize):
+    """Process pool worker: stream one CSV file into a partial accumulator"""
+    from sleep_data import load_sleep_csv
+    return SleepAnalyzer().accumulate(load_sleep_csv(path, chunksize=chunksize))
+
+
+def analyze_batch(paths, max_workers=None, chunksize=100_000, progress=None):
+    """Analyze many CSV files in parallel and merge them into global results
+
+    Files are spread across a process pool with at most ``2 * max_workers``
+    tasks in flight. Each worker returns a partial accumulator that the
+    parent merges, so the global results never require loading all files
+    at once. ``progress(done, total, path, error)`` is called as each file
+    finishes.
+
+    Returns a dict with per-file ``files`` results, merged ``global``
+    results, the total ``rows`` and per-file ``errors``.
+    """
+    analyzer = SleepAnalyzer()
+    paths = [str(path) for path in paths]
+    max_workers = max_workers or os.cpu_count() or 1
+    partials, errors = {}, {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        queue = iter(paths)
+        done_count = 0
+
+        def submit_next():
+            path = next(queue, None)
+            if path is not None:
+                pending[executor.submit(_accumulate_file, path, chunksize)] = path
+
+        for _ in range(2 * max_workers):
+            submit_next()
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    partials[path] = future.result()
+                else:
+                    errors[path] = str(error)
+                done_count += 1
+                if progress:
+                    progress(done_count, len(paths), path, error)
+                submit_next()
+
+    files = {path: analyzer.analyze_accumulated(partials[path]) for path in paths if path in partials}
+
+    categories = [c for c in analyzer.NUMERIC_CATEGORIES if any(c in p.categories for p in partials.values())]
+    columns = {}
+    for partial in partials.values():
+        for category, column in partial.columns.items():
+            columns.setdefault(category, column)
+    merged = StatsAccumulator(columns, categories, correlated=analyzer.CORRELATION_CATEGORIES)
+    for partial in partials.values():
+        merged.merge(partial)
+
+    if 'sleep_duration' in categories and merged.n_rows:
+        global_results = analyzer.analyze_accumulated(merged)
+    else:
+        global_results = analyzer._error_results(ValueError("No data provided for analysis"))
+
+    return {'files': files, 'global': global_results, 'rows': merged.n_rows, 'errors': errors}
+
+
+def _report_progress(done, total, path, error):
+    status = f"failed: {error}" if error else "ok"
+    print(f"[{done}/{total}] {path} {status}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='sleep_analyzer', description="Sleep data analysis from the command line")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stream = commands.add_parser('stream', help="Analyze a CSV file chunk by chunk in constant memory")
+    stream.add_argument('path', help="CSV file to analyze ('-' for stdin)")
+    stream.add_argument('--chunksize', type=int, default=100_000, help="Rows per chunk (default: 100000)")
+
+    batch = commands.add_parser('batch', help="Analyze every CSV in a directory in parallel")
+    batch.add_argument('directory', help="Directory containing per-cohort CSV files")
+    batch.add_argument('--pattern', default='*.csv', help="Glob pattern for input files (default: *.csv)")
+    batch.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    batch.add_argument('--chunksize', type=int, default=100_000, help="Rows per chunk (default: 100000)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'stream':
+        from sleep_data import load_sleep_csv
+        source = sys.stdin if args.path == '-' else args.path
+        chunks = load_sleep_csv(source, chunksize=args.chunksize)
+        results = SleepAnalyzer().analyze_stream(chunks)
+    elif args.command == 'batch':
+        paths = sorted(Path(args.directory).glob(args.pattern))
+        if not paths:
+            parser.error(f"no files matching {args.pattern!r} in {args.directory}")
+        results = analyze_batch(paths, max_workers=args.workers, chunksize=args.chunksize,
+                                progress=_report_progress)
+
+    json.dump(results, sys.stdout, indent=2, default=float)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
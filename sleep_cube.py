@@ -0,0 +1,272 @@
+import numpy as np
+import pandas as pd
+
+from sleep_stats import DEFAULT_QUANTILES, ColumnStats, QuantileSketch, column_matrix
+
+# Dimension name -> (source column, bin edges, labels); categorical dimensions have no bins
+DEFAULT_DIMENSIONS = {
+    'Gender': ('Gender', None, None),
+    'University_Year': ('University_Year', None, None),
+    'Caffeine_Band': ('Caffeine_Intake', [0, 1, 3, np.inf], ['None', '1-2 cups', '3+ cups']),
+    'Activity_Band': ('Physical_Activity', [0, 30, 60, np.inf], ['<30 min', '30-59 min', '60+ min']),
+    'Age_Band': ('Age', [0, 21, 24, np.inf], ['18-20', '21-23', '24+'])
+}
+DEFAULT_MEASURES = ['Sleep_Duration', 'Sleep_Quality', 'Study_Hours', 'Screen_Time',
+                    'Caffeine_Intake', 'Physical_Activity']
+# Level for rows whose dimension value is missing or outside every bin
+MISSING_LEVEL = 'Unknown'
+
+
+def _dimension_codes(series, bins, labels):
+    """Integer level codes for one dimension, with missing values mapped to MISSING_LEVEL"""
+    if bins is not None:
+        values = pd.to_numeric(series, errors='coerce')
+        codes = pd.cut(values, bins=bins, labels=False, right=False)
+        levels = list(labels)
+    else:
+        categorical = pd.Categorical(series)
+        codes = pd.Series(categorical.codes, index=series.index).where(categorical.codes >= 0)
+        levels = [str(level) for level in categorical.categories]
+    codes = codes.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    missing = np.isnan(codes)
+    if missing.any():
+        levels.append(MISSING_LEVEL)
+        codes[missing] = len(levels) - 1
+    return codes.astype(np.intp), levels
+
+
+class SleepCube:
+    """Aggregates of sleep metrics for every combination of dimension levels
+
+    Each cell holds the count, sum, sum of squares, min and max of every
+    measure plus a mergeable quantile sketch, so any slice or roll-up is
+    answered from the cells alone without touching the rows again.
+    """
+
+    def __init__(self, levels, measures, count, total, total_sq, minimum, maximum, sketches):
+        self.levels = levels
+        self.measures = list(measures)
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+        self.minimum = minimum
+        self.maximum = maximum
+        self.sketches = sketches
+
+    @property
+    def dimensions(self):
+        return list(self.levels)
+
+    @property
+    def shape(self):
+        return self.count.shape[:-1]
+
+    def slice(self, **filters):
+        """Restrict dimensions to the given level or list of levels, e.g. ``slice(Gender='Female')``"""
+        levels = dict(self.levels)
+        index = []
+        for dimension, dimension_levels in self.levels.items():
+            if dimension not in filters:
+                index.append(np.arange(len(dimension_levels)))
+                continue
+            wanted = filters[dimension]
+            wanted = [wanted] if isinstance(wanted, str) or not np.iterable(wanted) else list(wanted)
+            unknown = [level for level in wanted if level not in dimension_levels]
+            if unknown:
+                raise ValueError(f"Unknown {dimension} levels: {', '.join(map(str, unknown))}")
+            positions = [dimension_levels.index(level) for level in wanted]
+            index.append(np.array(positions, dtype=np.intp))
+            levels[dimension] = wanted
+        unknown = set(filters) - set(self.levels)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}")
+
+        selector = np.ix_(*index, np.arange(len(self.measures)))
+        return SleepCube(levels, self.measures, self.count[selector], self.total[selector],
+                         self.total_sq[selector], self.minimum[selector], self.maximum[selector],
+                         self.sketches[selector])
+
+    def rollup(self, by=()):
+        """Aggregate away every dimension not in ``by``"""
+        by = list(by)
+        unknown = set(by) - set(self.levels)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}")
+        keep = [self.dimensions.index(dimension) for dimension in by]
+        drop = [axis for axis in range(len(self.levels)) if axis not in keep]
+        order = keep + drop + [len(self.levels)]
+        out_shape = tuple(len(self.levels[dimension]) for dimension in by)
+        n_out = int(np.prod(out_shape, dtype=np.intp))
+
+        def grouped(array):
+            return array.transpose(order).reshape(n_out, -1, len(self.measures))
+
+        count = grouped(self.count).sum(axis=1)
+        total = grouped(self.total).sum(axis=1)
+        total_sq = grouped(self.total_sq).sum(axis=1)
+        minimum = grouped(self.minimum).min(axis=1)
+        maximum = grouped(self.maximum).max(axis=1)
+
+        cell_sketches = grouped(self.sketches)
+        sketches = np.empty((n_out, len(self.measures)), dtype=object)
+        for cell in range(n_out):
+            for j in range(len(self.measures)):
+                parts = [sketch for sketch in cell_sketches[cell, :, j] if sketch is not None]
+                if parts:
+                    merged = QuantileSketch(parts[0].relative_accuracy, parts[0].max_buckets)
+                    for part in parts:
+                        merged.merge(part)
+                    sketches[cell, j] = merged
+
+        shape = out_shape + (len(self.measures),)
+        return SleepCube({dimension: self.levels[dimension] for dimension in by}, self.measures,
+                         count.reshape(shape), total.reshape(shape), total_sq.reshape(shape),
+                         minimum.reshape(shape), maximum.reshape(shape), sketches.reshape(shape))
+
+    def merge(self, other):
+        """Combine with a cube over the same dimensions and measures, e.g. one built from newly appended rows
+
+        Levels are aligned by name, so ``other`` may hold levels this cube has
+        not seen yet. Only the cells are touched, never the underlying rows.
+        """
+        if list(other.levels) != list(self.levels) or other.measures != self.measures:
+            raise ValueError("Cannot merge cubes with different dimensions or measures")
+        levels = {
+            dimension: dimension_levels + [level for level in other.levels[dimension] if level not in dimension_levels]
+            for dimension, dimension_levels in self.levels.items()
+        }
+        shape = tuple(len(dimension_levels) for dimension_levels in levels.values()) + (len(self.measures),)
+
+        def positions(cube):
+            return np.ix_(*[np.array([levels[dimension].index(level) for level in cube.levels[dimension]],
+                                     dtype=np.intp) for dimension in levels], np.arange(len(self.measures)))
+
+        def combine(attribute, fill, reduce):
+            out = np.full(shape, fill, dtype=getattr(self, attribute).dtype)
+            for cube in (self, other):
+                selector = positions(cube)
+                out[selector] = reduce(out[selector], getattr(cube, attribute))
+            return out
+
+        sketches = np.empty(shape, dtype=object)
+        sketches[positions(self)] = self.sketches
+        target = positions(other)
+        merged_sketches = sketches[target]
+        for cell in np.ndindex(*other.sketches.shape):
+            part = other.sketches[cell]
+            if part is None:
+                continue
+            merged = QuantileSketch(part.relative_accuracy, part.max_buckets)
+            for sketch in (merged_sketches[cell], part):
+                if sketch is not None:
+                    merged.merge(sketch)
+            merged_sketches[cell] = merged
+        sketches[target] = merged_sketches
+
+        return SleepCube(levels, self.measures, combine('count', 0, np.add), combine('total', 0.0, np.add),
+                         combine('total_sq', 0.0, np.add), combine('minimum', np.inf, np.minimum),
+                         combine('maximum', -np.inf, np.maximum), sketches)
+
+    def stats(self, measure, quantiles=DEFAULT_QUANTILES, **filters):
+        """``ColumnStats`` of one measure over the cells matching ``filters``"""
+        cube = self.slice(**filters) if filters else self
+        return cube.summary(measure, quantiles=quantiles, column_stats=True)[0]
+
+    def summary(self, measure, by=(), quantiles=DEFAULT_QUANTILES, column_stats=False):
+        """Per-group statistics of one measure as a DataFrame (empty groups omitted)
+
+        With ``column_stats`` the groups are returned as a list of
+        ``ColumnStats`` instead, in the same order.
+        """
+        cube = self.rollup(by)
+        j = self.measures.index(measure)
+        records = []
+        for position in np.ndindex(*cube.shape):
+            count = int(cube.count[position + (j,)])
+            if not count and not (column_stats and not by):
+                continue
+            total, total_sq = cube.total[position + (j,)], cube.total_sq[position + (j,)]
+            mean = total / count if count else float('nan')
+            variance = (total_sq - total * mean) / (count - 1) if count > 1 else float('nan')
+            low, high = float(cube.minimum[position + (j,)]), float(cube.maximum[position + (j,)])
+            sketch = cube.sketches[position + (j,)]
+            values = sketch.quantiles(quantiles) if sketch is not None else [float('nan')] * len(quantiles)
+            stats = ColumnStats(
+                column=measure,
+                count=count,
+                mean=float(mean),
+                variance=float(max(variance, 0.0)) if count > 1 else float('nan'),
+                min=low if count else float('nan'),
+                max=high if count else float('nan'),
+                quantiles={q: min(max(value, low), high) if count else float('nan')
+                           for q, value in zip(quantiles, values)}
+            )
+            group = {dimension: cube.levels[dimension][i] for dimension, i in zip(by, position)}
+            records.append((group, stats))
+
+        if column_stats:
+            return [stats for _, stats in records]
+        return pd.DataFrame([
+            {**group, 'count': stats.count, 'mean': stats.mean, 'std': stats.std, 'min': stats.min,
+             'max': stats.max, **{f'q{round(q * 100):02d}': value for q, value in stats.quantiles.items()}}
+            for group, stats in records
+        ], columns=list(by) + ['count', 'mean', 'std', 'min', 'max']
+           + [f'q{round(q * 100):02d}' for q in quantiles])
+
+
+def build_cube(df, dimensions=None, measures=None, relative_accuracy=0.01):
+    """Aggregate ``df`` into a ``SleepCube`` in one vectorized pass
+
+    Dimensions and measures whose source columns are absent are skipped.
+    """
+    dimensions = DEFAULT_DIMENSIONS if dimensions is None else dimensions
+    measures = [measure for measure in (measures or DEFAULT_MEASURES) if measure in df.columns]
+
+    levels = {}
+    codes = []
+    for name, (column, bins, labels) in dimensions.items():
+        if column not in df.columns:
+            continue
+        dimension_codes, levels[name] = _dimension_codes(df[column], bins, labels)
+        codes.append(dimension_codes)
+
+    shape = tuple(len(dimension_levels) for dimension_levels in levels.values())
+    n_cells = int(np.prod(shape, dtype=np.intp))
+    cells = np.ravel_multi_index(codes, shape) if codes else np.zeros(len(df), dtype=np.intp)
+
+    matrix = column_matrix(df, measures)
+    valid = ~np.isnan(matrix)
+    values = np.where(valid, matrix, 0.0)
+    count = np.zeros((n_cells, len(measures)))
+    total = np.zeros((n_cells, len(measures)))
+    total_sq = np.zeros((n_cells, len(measures)))
+    for j in range(len(measures)):
+        count[:, j] = np.bincount(cells, weights=valid[:, j], minlength=n_cells)
+        total[:, j] = np.bincount(cells, weights=values[:, j], minlength=n_cells)
+        total_sq[:, j] = np.bincount(cells, weights=values[:, j] ** 2, minlength=n_cells)
+
+    # Rows grouped by cell once; min/max reduce over the segments and sketches fill per cell
+    order = np.argsort(cells, kind='stable')
+    boundaries = np.searchsorted(cells[order], np.arange(n_cells + 1))
+    occupied = np.flatnonzero(np.diff(boundaries))
+    grouped = matrix[order]
+    minimum = np.full((n_cells, len(measures)), np.inf)
+    maximum = np.full((n_cells, len(measures)), -np.inf)
+    if len(occupied):
+        starts = boundaries[occupied]
+        minimum[occupied] = np.minimum.reduceat(np.where(np.isnan(grouped), np.inf, grouped), starts, axis=0)
+        maximum[occupied] = np.maximum.reduceat(np.where(np.isnan(grouped), -np.inf, grouped), starts, axis=0)
+
+    sketches = np.empty((n_cells, len(measures)), dtype=object)
+    for cell in occupied:
+        rows = grouped[boundaries[cell]:boundaries[cell + 1]]
+        for j in range(len(measures)):
+            if count[cell, j]:
+                sketch = QuantileSketch(relative_accuracy)
+                sketch.add(rows[:, j])
+                sketches[cell, j] = sketch
+
+    cube_shape = shape + (len(measures),)
+    return SleepCube(levels, measures, count.reshape(cube_shape).astype(np.int64), total.reshape(cube_shape),
+                     total_sq.reshape(cube_shape), minimum.reshape(cube_shape), maximum.reshape(cube_shape),
+                     sketches.reshape(cube_shape))
@@ -0,0 +1,193 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from sleep_analyzer import SleepAnalyzer
+from timeseries import DATE_COLUMN, to_dates
+
+try:
+    import pyarrow  # noqa: F401
+    DEFAULT_ENGINE = 'pyarrow'
+except ImportError:
+    DEFAULT_ENGINE = 'c'
+
+# Compact dtypes per analyzer category; nullable integers keep missing values
+CATEGORY_DTYPES = {
+    'sleep_duration': 'float32',
+    'quality': 'Int8',
+    'study': 'float32',
+    'screen': 'float32',
+    'activity': 'float32',
+    'caffeine': 'Int8',
+    'gender': 'category',
+    'year': 'category'
+}
+
+# Columns outside the analyzer mappings that the dashboard still needs
+EXTRA_DTYPES = {
+    'Student_ID': 'Int32',
+    'Age': 'Int8',
+    'Weekday_Sleep_Start': 'float32',
+    'Weekend_Sleep_Start': 'float32',
+    'Weekday_Sleep_End': 'float32',
+    'Weekend_Sleep_End': 'float32',
+    # Night of the record; parsed after reading since CSV parsers cannot take it as a dtype
+    DATE_COLUMN: 'datetime64[ns]'
+}
+
+
+def _build_schema():
+    schema = dict(EXTRA_DTYPES)
+    for category, names in SleepAnalyzer().column_mappings.items():
+        for name in names:
+            schema.setdefault(name, CATEGORY_DTYPES.get(category))
+    return schema
+
+
+# Column name -> dtype for every column the loader keeps (None: inferred)
+SLEEP_SCHEMA = _build_schema()
+
+
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def _is_rewindable(source):
+    return _is_path(source) or (hasattr(source, 'seekable') and source.seekable())
+
+
+def _read_header(source):
+    """Read only the header row, rewinding file-like sources afterwards"""
+    if _is_path(source):
+        return list(pd.read_csv(source, nrows=0).columns)
+    position = source.tell()
+    columns = pd.read_csv(source, nrows=0).columns
+    source.seek(position)
+    return list(columns)
+
+
+def _known_column(schema):
+    return lambda column: column in schema
+
+
+def _parse_dtypes(schema, columns=None):
+    """Dtypes the CSV parser can apply while reading (dates are converted afterwards)"""
+    columns = schema if columns is None else columns
+    return {column: schema[column] for column in columns
+            if schema[column] is not None and not schema[column].startswith('datetime')}
+
+
+def _parse_dates(df, schema):
+    for column in df.columns:
+        if (schema.get(column) or '').startswith('datetime'):
+            df[column] = to_dates(df[column])
+    return df
+
+
+def load_sleep_csv(source, schema=SLEEP_SCHEMA, engine=None, **kwargs):
+    """Read a sleep CSV keeping only known columns, with compact dtypes applied while parsing
+
+    Uses the pyarrow parser when it is installed, and the C parser for
+    ``chunksize`` reads or unseekable streams such as stdin. If a column does
+    not fit its declared dtype, rewindable sources are re-read with inferred
+    dtypes and narrowed with ``apply_schema``. Chunked reads are always
+    narrowed chunk by chunk, since a mismatch may only show up mid-file.
+    A Date column is parsed to day-resolution datetimes after reading.
+    """
+    if 'chunksize' in kwargs:
+        chunks = pd.read_csv(source, usecols=_known_column(schema), engine='c', **kwargs)
+        return (apply_schema(chunk, schema) for chunk in chunks)
+
+    rewindable = _is_rewindable(source)
+    if engine is None:
+        engine = DEFAULT_ENGINE if rewindable else 'c'
+
+    if engine == 'pyarrow':
+        # pyarrow only accepts an explicit column list
+        usecols = [column for column in _read_header(source) if column in schema]
+        dtype = _parse_dtypes(schema, usecols)
+    else:
+        usecols = _known_column(schema)
+        dtype = _parse_dtypes(schema)
+
+    position = None if _is_path(source) or not rewindable else source.tell()
+    try:
+        return _parse_dates(pd.read_csv(source, usecols=usecols, dtype=dtype, engine=engine, **kwargs), schema)
+    except (ValueError, TypeError, OverflowError):
+        if not rewindable:
+            raise
+        if position is not None:
+            source.seek(position)
+        return apply_schema(pd.read_csv(source, usecols=_known_column(schema), **kwargs), schema)
+
+
+def apply_schema(df, schema=SLEEP_SCHEMA):
+    """Narrow the dtypes of an existing DataFrame in place where the values allow it"""
+    for column in df.columns:
+        dtype = schema.get(column)
+        if dtype is None:
+            continue
+        try:
+            if dtype.startswith('datetime'):
+                df[column] = to_dates(df[column])
+            elif dtype.startswith(('Int', 'float')):
+                df[column] = pd.to_numeric(df[column], errors='raise').astype(dtype)
+            else:
+                df[column] = df[column].astype(dtype)
+        except (ValueError, TypeError, OverflowError):
+            continue
+    return df
+
+
+def memory_usage_per_row(df):
+    """Deep resident bytes per row, including string and categorical storage"""
+    return df.memory_usage(deep=True, index=False).sum() / max(len(df), 1)
+
+
+def memory_report(path):
+    """Compare resident memory of a CSV read with default dtypes against the compact schema"""
+    default = pd.read_csv(path)
+    compact = load_sleep_csv(path)
+    rows = []
+    for column in compact.columns:
+        before = default[column].memory_usage(deep=True, index=False)
+        after = compact[column].memory_usage(deep=True, index=False)
+        rows.append({
+            'column': column,
+            'default_dtype': str(default[column].dtype),
+            'schema_dtype': str(compact[column].dtype),
+            'default_bytes': before,
+            'schema_bytes': after
+        })
+    report = pd.DataFrame(rows).set_index('column')
+    summary = {
+        'rows': len(compact),
+        'default_bytes_per_row': memory_usage_per_row(default),
+        'schema_bytes_per_row': memory_usage_per_row(compact)
+    }
+    summary['reduction'] = summary['default_bytes_per_row'] / summary['schema_bytes_per_row']
+    return report, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='sleep_data', description="Sleep data loading utilities")
+    commands = parser.add_subparsers(dest='command', required=True)
+    memory = commands.add_parser('memory', help="Report memory per row with and without the compact schema")
+    memory.add_argument('path', help="CSV file to load")
+    args = parser.parse_args(argv)
+
+    if args.command == 'memory':
+        report, summary = memory_report(args.path)
+        print(report.to_string())
+        print()
+        print(f"rows:                  {summary['rows']:,}")
+        print(f"default bytes per row: {summary['default_bytes_per_row']:.1f}")
+        print(f"schema bytes per row:  {summary['schema_bytes_per_row']:.1f}")
+        print(f"reduction:             {summary['reduction']:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
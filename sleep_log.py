@@ -0,0 +1,207 @@
+"""Append-only log of nights entered on the dashboard
+
+Manual and multi-day entries are appended to growable column arrays. Each
+append enriches and analyzes only the new rows: the statistics accumulator,
+the aggregate cube, the anomaly scores and the chart traces are all updated
+from the delta, so logging one more night does not reprocess the earlier ones.
+"""
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from charts import create_visualizations, extend_visualizations
+from pipeline import enrich_dataset
+from sleep_analyzer import AnomalyResult, SleepAnalyzer
+from sleep_cube import build_cube
+
+
+def _column_values(series):
+    """Values of one column as the numpy array the log stores"""
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return series.to_numpy(dtype='datetime64[ns]')
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        return series.to_numpy()
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return series.astype(object).to_numpy()
+
+
+def _missing_value(dtype):
+    if dtype.kind == 'M':
+        return np.datetime64('NaT')
+    return np.nan if dtype.kind == 'f' else None
+
+
+def _nullable(dtype):
+    """Dtype that can also hold missing values"""
+    if dtype.kind in 'iu':
+        return np.dtype(np.float64)
+    return np.dtype(object) if dtype.kind == 'b' else dtype
+
+
+def _common_dtype(a, b):
+    if a == b:
+        return a
+    if a.kind in 'biuf' and b.kind in 'biuf':
+        return np.result_type(a, b)
+    return np.dtype(object)
+
+
+class SleepLog:
+    """Growable column store of logged nights with running analysis state
+
+    Columns are preallocated numpy arrays that double in capacity when full,
+    so an append copies only the new rows. Analysis results come from a
+    ``StatsAccumulator`` (exact moments, sketched quantiles), the cube is
+    merged cell-wise and the anomaly model is refitted only when the log has
+    doubled since the last fit; in between, only new rows are scored.
+    """
+
+    def __init__(self, analyzer=None, capacity=64, min_anomaly_rows=10):
+        self.analyzer = analyzer or SleepAnalyzer()
+        self.capacity = capacity
+        self.min_anomaly_rows = min_anomaly_rows
+        self.size = 0
+        self.version = 0
+        self.log_id = uuid.uuid4().hex
+        self.accumulator = None
+        self.cube = None
+        self.anomaly_model = None
+        self._fit_size = 0
+        self._columns = {}
+        self._anomaly_indices = []
+        self._anomaly_scores = []
+        self._n_scored = 0
+        self._frame = None
+        self._analysis = None
+        self._charts = None
+        self._chart_budgets = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def fingerprint(self):
+        """Changes with every append, without hashing the rows"""
+        return f'{self.log_id}:{self.version}'
+
+    def append(self, rows):
+        """Append new nights and update the running state from them alone; returns the enriched rows
+
+        Rows without a Date are dated on consecutive nights ending today, so
+        undated entries never run into the future.
+        """
+        delta = rows.reset_index(drop=True).copy()
+        if delta.empty:
+            return delta
+        if 'Date' not in delta.columns:
+            delta['Date'] = self._next_dates(len(delta))
+        enrich_dataset(delta)
+
+        start = self.size
+        self._write(delta)
+        delta.index = pd.RangeIndex(start, self.size)
+        self.version += 1
+        self._frame = None
+        self._analysis = None
+
+        if self.accumulator is None:
+            self.accumulator = self.analyzer.create_accumulator(delta)
+        self.accumulator.update(delta)
+        delta_cube = build_cube(delta)
+        self.cube = delta_cube if self.cube is None else self.cube.merge(delta_cube)
+        self._update_anomalies(delta)
+        if self._charts is not None and not extend_visualizations(
+                self._charts, delta, self.frame(), self._chart_budgets, cube=self.cube):
+            self._charts = None
+        return delta
+
+    def clear(self):
+        self.__init__(self.analyzer, self.capacity, self.min_anomaly_rows)
+
+    def frame(self):
+        """The logged nights as a DataFrame sharing the log's arrays; treat it as read-only"""
+        if self._frame is None:
+            self._frame = pd.DataFrame(
+                {name: column[:self.size] for name, column in self._columns.items()}, copy=False
+            )
+        return self._frame
+
+    def analysis(self):
+        """Analysis results in the format of ``SleepAnalyzer.analyze``"""
+        if self.accumulator is None:
+            raise ValueError("The sleep log is empty")
+        if self._analysis is None:
+            self._analysis = self.analyzer.analyze_accumulated(self.accumulator)
+        return self._analysis
+
+    @property
+    def anomalies(self):
+        return AnomalyResult(
+            indices=pd.Index(self._anomaly_indices, dtype=np.int64),
+            scores=np.array(self._anomaly_scores, dtype=np.float64),
+            n_scored=self._n_scored,
+            columns=list(self.anomaly_model.columns) if self.anomaly_model else []
+        )
+
+    def visualizations(self, budgets=None):
+        """Dashboard figures for the log, built once and then extended on every append"""
+        if self._charts is None or budgets != self._chart_budgets:
+            self._charts = create_visualizations(self.frame().copy(), budgets, cube=self.cube)
+            self._chart_budgets = budgets
+        return self._charts
+
+    def _next_dates(self, n):
+        return pd.date_range(end=pd.Timestamp.today().normalize(), periods=n, freq='D')
+
+    def _reserve(self, n_rows):
+        if n_rows <= self.capacity:
+            return
+        self.capacity = max(n_rows, 2 * self.capacity)
+        for name, column in self._columns.items():
+            grown = np.empty(self.capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self._columns[name] = grown
+
+    def _write(self, delta):
+        end = self.size + len(delta)
+        self._reserve(end)
+        for name in delta.columns:
+            values = _column_values(delta[name])
+            column = self._columns.get(name)
+            if column is None:
+                column = np.empty(self.capacity, dtype=_nullable(values.dtype) if self.size else values.dtype)
+                if self.size:
+                    column[:self.size] = _missing_value(column.dtype)
+            elif _common_dtype(column.dtype, values.dtype) != column.dtype:
+                column = column.astype(_common_dtype(column.dtype, values.dtype))
+            column[self.size:end] = values
+            self._columns[name] = column
+
+        for name, column in self._columns.items():
+            if name not in delta.columns:
+                if _nullable(column.dtype) != column.dtype:
+                    column = self._columns[name] = column.astype(_nullable(column.dtype))
+                column[self.size:end] = _missing_value(column.dtype)
+        self.size = end
+
+    def _update_anomalies(self, delta):
+        if self.size < self.min_anomaly_rows:
+            return
+        if not self._fit_size or self.size >= 2 * max(self._fit_size, self.min_anomaly_rows):
+            # Geometric refits keep the amortized cost per appended night constant
+            rows = self.frame()
+            self.anomaly_model = self.analyzer.fit_anomaly_model(rows, min_rows=self.min_anomaly_rows)
+            self._fit_size = self.size
+            self._anomaly_indices, self._anomaly_scores, self._n_scored = [], [], 0
+        else:
+            rows = delta
+        if self.anomaly_model is None:
+            # Too few complete nights yet; retried at the next refit
+            return
+        result = self.analyzer.score_anomalies(rows, model=self.anomaly_model, n_jobs=1)
+        self._anomaly_indices.extend(result.indices.tolist())
+        self._anomaly_scores.extend(result.scores.tolist())
+        self._n_scored += result.n_scored
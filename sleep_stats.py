@@ -0,0 +1,444 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+@dataclass(frozen=True)
+class ColumnStats:
+    """Moments and order statistics of a single numeric column"""
+    column: str
+    count: int
+    mean: float
+    variance: float
+    min: float
+    max: float
+    quantiles: dict = field(default_factory=dict)
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    def quantile(self, q):
+        return self.quantiles.get(q, float('nan'))
+
+
+@dataclass(frozen=True)
+class SleepStats:
+    """Statistics for every mapped numeric column of a dataset, keyed by category"""
+    n_rows: int
+    columns: dict
+    stats: dict
+    correlations: object = None
+
+    def __contains__(self, category):
+        return category in self.stats
+
+    def get(self, category):
+        return self.stats.get(category)
+
+    def mean(self, category, default=float('nan')):
+        column_stats = self.stats.get(category)
+        return column_stats.mean if column_stats else default
+
+
+def column_matrix(df, columns):
+    """Stack the given columns into one float64 matrix, coercing non-numeric values to NaN"""
+    matrix = np.empty((len(df), len(columns)), dtype=np.float64)
+    for j, column in enumerate(columns):
+        series = df[column]
+        if not pd.api.types.is_numeric_dtype(series):
+            series = pd.to_numeric(series, errors='coerce')
+        matrix[:, j] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return matrix
+
+
+def compute_column_stats(matrix, columns, quantiles=DEFAULT_QUANTILES):
+    """Compute count, mean, variance, min, max and quantiles for every column of ``matrix``
+
+    The columns are sorted once; every statistic is then read off the sorted
+    block, so the data is only traversed by vectorized kernels and never by
+    per-column pandas reductions.
+    """
+    ordered = np.sort(matrix, axis=0)  # NaNs sort to the end
+    counts = np.count_nonzero(~np.isnan(ordered), axis=0)
+    valid = np.arange(ordered.shape[0])[:, None] < counts
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(valid, ordered, 0.0).sum(axis=0) / counts
+        centered = np.where(valid, ordered - means, 0.0)
+        variances = np.einsum('ij,ij->j', centered, centered) / (counts - 1)
+    variances[counts < 2] = np.nan
+
+    last = np.maximum(counts - 1, 0)
+    quantile_values = _sorted_quantiles(ordered, last, quantiles)
+
+    results = []
+    for j, column in enumerate(columns):
+        empty = counts[j] == 0
+        results.append(ColumnStats(
+            column=column,
+            count=int(counts[j]),
+            mean=float(means[j]),
+            variance=float(variances[j]),
+            min=float('nan') if empty else float(ordered[0, j]),
+            max=float('nan') if empty else float(ordered[last[j], j]),
+            quantiles={q: float('nan') if empty else float(quantile_values[i, j])
+                       for i, q in enumerate(quantiles)}
+        ))
+    return results
+
+
+def _sorted_quantiles(ordered, last, quantiles):
+    """Linearly interpolated quantiles of column-wise sorted data (numpy's default method)"""
+    if ordered.shape[0] == 0:
+        return np.full((len(quantiles), ordered.shape[1]), np.nan)
+    positions = np.asarray(quantiles, dtype=np.float64)[:, None] * last
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, last)
+    fraction = positions - lower
+    low_values = np.take_along_axis(ordered, lower, axis=0)
+    high_values = np.take_along_axis(ordered, upper, axis=0)
+    return low_values + (high_values - low_values) * fraction
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch)
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within ``relative_accuracy`` of the true value while memory stays bounded
+    by ``max_buckets`` regardless of how many values are added.
+    """
+    min_indexable = 1e-9
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.count += int(values.size)
+        self.zero_count += int(np.count_nonzero(np.abs(values) < self.min_indexable))
+        self._add_to_store(self.positive, values[values >= self.min_indexable])
+        self._add_to_store(self.negative, -values[values <= -self.min_indexable])
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+            self._collapse(store)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantiles(self, qs):
+        """Return the approximate value at each quantile in ``qs``"""
+        if self.count == 0:
+            return [float('nan')] * len(qs)
+        negative_keys = sorted(self.negative, reverse=True)
+        positive_keys = sorted(self.positive)
+        values = np.concatenate([
+            -self._bucket_values(negative_keys),
+            [0.0],
+            self._bucket_values(positive_keys)
+        ])
+        counts = np.array(
+            [self.negative[k] for k in negative_keys] + [self.zero_count] + [self.positive[k] for k in positive_keys],
+            dtype=np.float64
+        )
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(qs, dtype=np.float64) * (self.count - 1)
+        index = np.minimum(np.searchsorted(cumulative, ranks, side='right'), len(values) - 1)
+        return values[index].tolist()
+
+    def _bucket_values(self, keys):
+        keys = np.asarray(keys, dtype=np.float64)
+        return 2 * self.gamma ** keys / (self.gamma + 1)
+
+    def _add_to_store(self, store, values):
+        if not values.size:
+            return
+        keys = np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+        unique, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+        self._collapse(store)
+
+    def _collapse(self, store):
+        """Fold the lowest buckets together once the store exceeds its bucket budget"""
+        if len(store) <= self.max_buckets:
+            return
+        keys = sorted(store)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        target = excess[-1]
+        store[target] = sum(store.pop(key) for key in excess[:-1]) + store[target]
+
+
+class StatsAccumulator:
+    """Mergeable running statistics for the mapped numeric columns of a dataset
+
+    Means and variances are combined chunk by chunk with the Welford/Chan
+    update, min and max are tracked exactly and quantiles come from a
+    ``QuantileSketch`` per column, so memory does not grow with the row count.
+    Partial accumulators built from separate chunks or files can be merged.
+    Co-moments are kept for the ``correlated`` categories only (default: all).
+    """
+
+    def __init__(self, columns, categories, quantiles=DEFAULT_QUANTILES, relative_accuracy=0.01, correlated=None):
+        self.columns = dict(columns)
+        self.categories = list(categories)
+        correlated = self.categories if correlated is None else [c for c in self.categories if c in correlated]
+        self._correlated_index = [self.categories.index(category) for category in correlated]
+        self.quantile_levels = tuple(quantiles)
+        size = len(self.categories)
+        self.n_rows = 0
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+        self.sketches = [QuantileSketch(relative_accuracy) for _ in self.categories]
+        self.correlations = CorrelationAccumulator(
+            [self.columns[category] for category in correlated], keys=correlated
+        )
+
+    def update(self, df):
+        """Fold a DataFrame chunk into the running statistics"""
+        matrix = column_matrix(df, [self.columns[category] for category in self.categories])
+        self.update_matrix(matrix)
+
+    def update_matrix(self, matrix):
+        self.n_rows += matrix.shape[0]
+        valid = ~np.isnan(matrix)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(valid, matrix, 0.0).sum(axis=0) / count
+            centered = np.where(valid, matrix - mean, 0.0)
+            m2 = np.einsum('ij,ij->j', centered, centered)
+        self._combine(
+            count, mean, m2,
+            np.where(valid, matrix, np.inf).min(axis=0, initial=np.inf),
+            np.where(valid, matrix, -np.inf).max(axis=0, initial=-np.inf)
+        )
+        for j, sketch in enumerate(self.sketches):
+            sketch.add(matrix[valid[:, j], j])
+        if self.correlations is not None:
+            self.correlations.update_matrix(matrix[:, self._correlated_index])
+
+    def merge(self, other):
+        """Merge another accumulator into this one, aligning the columns by category
+
+        ``other`` may cover a subset of this accumulator's categories, which
+        lets a global accumulator absorb files that lack some columns.
+        """
+        missing = [category for category in other.categories if category not in self.categories]
+        if missing:
+            raise ValueError(f"Cannot merge accumulator with unknown categories: {', '.join(missing)}")
+        index = [self.categories.index(category) for category in other.categories]
+        size = len(self.categories)
+        count = np.zeros(size, dtype=np.int64)
+        mean, m2 = np.zeros(size), np.zeros(size)
+        mins, maxs = np.full(size, np.inf), np.full(size, -np.inf)
+        count[index], mean[index], m2[index] = other.count, other.mean, other.m2
+        mins[index], maxs[index] = other.min, other.max
+
+        self.n_rows += other.n_rows
+        self._combine(count, mean, m2, mins, maxs)
+        for j, other_sketch in zip(index, other.sketches):
+            self.sketches[j].merge(other_sketch)
+        # Co-moments over a different column set cannot be combined row-wise
+        if self.correlations is not None and other.correlations is not None \
+                and other.correlations.keys == self.correlations.keys:
+            self.correlations.merge(other.correlations)
+        else:
+            self.correlations = None
+        return self
+
+    def _combine(self, count, mean, m2, mins, maxs):
+        """Chan et al. parallel update of count, mean and sum of squared deviations"""
+        total = self.count + count
+        weight = count / np.maximum(total, 1)
+        mean = np.where(count > 0, mean, 0.0)
+        m2 = np.where(count > 0, m2, 0.0)
+        delta = mean - self.mean
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * weight
+        self.mean = self.mean + delta * weight
+        self.count = total
+        self.min = np.minimum(self.min, mins)
+        self.max = np.maximum(self.max, maxs)
+
+    def to_stats(self):
+        """Freeze the running state into a ``SleepStats`` object"""
+        stats = {}
+        for j, category in enumerate(self.categories):
+            count = int(self.count[j])
+            empty = count == 0
+            low, high = float(self.min[j]), float(self.max[j])
+            quantile_values = self.sketches[j].quantiles(self.quantile_levels)
+            stats[category] = ColumnStats(
+                column=self.columns[category],
+                count=count,
+                mean=float('nan') if empty else float(self.mean[j]),
+                variance=float(self.m2[j] / (count - 1)) if count > 1 else float('nan'),
+                min=float('nan') if empty else low,
+                max=float('nan') if empty else high,
+                quantiles={q: float('nan') if empty else min(max(value, low), high)
+                           for q, value in zip(self.quantile_levels, quantile_values)}
+            )
+        return SleepStats(n_rows=self.n_rows, columns=dict(self.columns), stats=stats,
+                          correlations=self.correlations)
+
+
+class CorrelationAccumulator:
+    """Mergeable co-moment accumulator for Pearson and Spearman correlation matrices
+
+    Pearson correlations come from a running mean vector and co-moment
+    matrix combined chunk by chunk (Chan et al.), so appending or streaming
+    rows never needs another pass over earlier data. Spearman correlations
+    are computed from mid-ranks over logarithmic value buckets: marginal and
+    pairwise joint bucket counts are kept, and values sharing a bucket are
+    treated as ties. Rows with a missing value in any column are skipped.
+    Accumulators merge when their ``keys`` match; these default to the
+    column names, and category keys let aliased columns merge.
+    """
+    _key_limit = 2 ** 20
+
+    def __init__(self, columns, relative_accuracy=0.05, keys=None):
+        self.columns = list(columns)
+        self.keys = list(keys) if keys is not None else list(self.columns)
+        size = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.comoment = np.zeros((size, size))
+        self._log_gamma = np.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self._key_offset = np.ceil(np.log(QuantileSketch.min_indexable) / self._log_gamma) - 1
+        self.marginals = [{} for _ in self.columns]
+        self.joint = {pair: {} for pair in self._pairs()}
+
+    def _pairs(self):
+        size = len(self.columns)
+        return [(i, j) for i in range(size) for j in range(i + 1, size)]
+
+    def update(self, df):
+        self.update_matrix(column_matrix(df, self.columns))
+
+    def update_matrix(self, matrix):
+        rows = matrix[~np.isnan(matrix).any(axis=1)]
+        if not len(rows):
+            return
+        mean = rows.mean(axis=0)
+        centered = rows - mean
+        self._combine(len(rows), mean, centered.T @ centered)
+
+        keys = self._rank_keys(rows)
+        for j, marginal in enumerate(self.marginals):
+            _add_counts(marginal, *np.unique(keys[:, j], return_counts=True))
+        for (i, j), joint in self.joint.items():
+            codes = (keys[:, i] + self._key_limit) * (2 * self._key_limit) + (keys[:, j] + self._key_limit)
+            _add_counts(joint, *np.unique(codes, return_counts=True))
+
+    def merge(self, other):
+        if other.keys != self.keys:
+            raise ValueError("Cannot merge correlation accumulators over different columns")
+        self._combine(other.count, other.mean, other.comoment)
+        for marginal, other_marginal in zip(self.marginals, other.marginals):
+            _merge_counts(marginal, other_marginal)
+        for pair, joint in self.joint.items():
+            _merge_counts(joint, other.joint[pair])
+        return self
+
+    def _combine(self, count, mean, comoment):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * self.count * count / total
+        self.mean = self.mean + delta * count / total
+        self.count = total
+
+    def _rank_keys(self, rows):
+        """Order-preserving bucket keys: 0 near zero, signed log buckets elsewhere"""
+        magnitude = np.abs(rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keys = np.ceil(np.log(magnitude) / self._log_gamma) - self._key_offset
+            keys = np.where(magnitude < QuantileSketch.min_indexable, 0, np.sign(rows) * keys)
+        return np.clip(keys, 1 - self._key_limit, self._key_limit - 1).astype(np.int64)
+
+    def pearson(self):
+        """Pearson correlation matrix as a DataFrame"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scale = np.sqrt(np.diag(self.comoment))
+            matrix = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(np.clip(matrix, -1, 1), index=self.columns, columns=self.columns)
+
+    def spearman(self):
+        """Rank (Spearman) correlation matrix as a DataFrame"""
+        size = len(self.columns)
+        matrix = np.eye(size)
+        midranks = [self._midranks(marginal) for marginal in self.marginals]
+        for (i, j), joint in self.joint.items():
+            if not joint:
+                matrix[i, j] = matrix[j, i] = np.nan
+                continue
+            codes = np.fromiter(joint.keys(), dtype=np.int64, count=len(joint))
+            weights = np.fromiter(joint.values(), dtype=np.float64, count=len(joint))
+            keys_i = codes // (2 * self._key_limit) - self._key_limit
+            keys_j = codes % (2 * self._key_limit) - self._key_limit
+            matrix[i, j] = matrix[j, i] = _weighted_pearson(
+                midranks[i](keys_i), midranks[j](keys_j), weights
+            )
+        return pd.DataFrame(matrix, index=self.columns, columns=self.columns)
+
+    @staticmethod
+    def _midranks(marginal):
+        keys = np.array(sorted(marginal), dtype=np.int64)
+        counts = np.array([marginal[key] for key in keys], dtype=np.float64)
+        ranks = np.cumsum(counts) - (counts - 1) / 2
+        return lambda values: ranks[np.searchsorted(keys, values)]
+
+    def top(self, n=3, min_abs=0.1):
+        """Strongest column pairs as dicts with Pearson and Spearman coefficients"""
+        if self.count < 3:
+            return []
+        pearson = self.pearson().to_numpy()
+        spearman = self.spearman().to_numpy()
+        pairs = [
+            {
+                'columns': (self.columns[i], self.columns[j]),
+                'pearson': float(pearson[i, j]),
+                'spearman': float(spearman[i, j])
+            }
+            for i, j in self._pairs()
+            if np.isfinite(pearson[i, j]) and abs(pearson[i, j]) >= min_abs
+        ]
+        pairs.sort(key=lambda pair: abs(pair['pearson']), reverse=True)
+        return pairs[:n]
+
+
+def _add_counts(store, keys, counts):
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        store[key] = store.get(key, 0) + count
+
+
+def _merge_counts(store, other):
+    for key, count in other.items():
+        store[key] = store.get(key, 0) + count
+
+
+def _weighted_pearson(x, y, weights):
+    total = weights.sum()
+    x_centered = x - (weights * x).sum() / total
+    y_centered = y - (weights * y).sum() / total
+    covariance = (weights * x_centered * y_centered).sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return float(covariance / np.sqrt((weights * x_centered ** 2).sum() * (weights * y_centered ** 2).sum()))
@@ -0,0 +1,262 @@
+"""Local SQLite store of per-student, per-night sleep records
+
+Nights are keyed by ``(student_id, night)`` and indexed by night and by
+cohort, so dashboards query only the slice they show instead of re-uploading
+and re-parsing whole CSV files:
+
+    python -m sleep_store import student_sleep_patterns.csv --night 2026-10-01
+    python -m sleep_store query --start 2026-09-01 --gender Female -o slice.csv
+    python -m sleep_store stats
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sleep_data import apply_schema, load_sleep_csv
+from sleep_timing import MISSING_MINUTES, to_minutes
+
+DEFAULT_STORE_PATH = os.getenv('SLEEP_STORE_PATH', os.path.join('.cache', 'sleep_store.sqlite3'))
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Dashboard column -> SQLite column type; the key columns come first
+COLUMNS = {
+    'Student_ID': 'INTEGER NOT NULL',
+    'Date': 'TEXT NOT NULL',
+    'Age': 'INTEGER',
+    'Gender': 'TEXT',
+    'University_Year': 'TEXT',
+    'Sleep_Duration': 'REAL',
+    'Study_Hours': 'REAL',
+    'Screen_Time': 'REAL',
+    'Caffeine_Intake': 'INTEGER',
+    'Physical_Activity': 'INTEGER',
+    'Sleep_Quality': 'INTEGER',
+    'Weekday_Sleep_Start': 'REAL',
+    'Weekend_Sleep_Start': 'REAL',
+    'Weekday_Sleep_End': 'REAL',
+    'Weekend_Sleep_End': 'REAL'
+}
+TIME_COLUMNS = ['Weekday_Sleep_Start', 'Weekend_Sleep_Start', 'Weekday_Sleep_End', 'Weekend_Sleep_End']
+# Nights are stored as ISO dates, which sort and compare correctly as text
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def _sql_name(column):
+    return 'night' if column == 'Date' else column.lower()
+
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS nights (
+    {', '.join(f'{_sql_name(column)} {sql_type}' for column, sql_type in COLUMNS.items())},
+    PRIMARY KEY (student_id, night)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nights_night ON nights (night);
+CREATE INDEX IF NOT EXISTS nights_cohort ON nights (university_year, gender, night);
+"""
+
+
+def _night(value):
+    return pd.Timestamp(value).strftime(DATE_FORMAT)
+
+
+def _column_values(df, column, night):
+    """One column of ``df`` as a list of SQLite-bindable values"""
+    if column == 'Date':
+        dates = pd.to_datetime(df['Date']) if 'Date' in df.columns else pd.Series(pd.NaT, index=df.index)
+        return dates.dt.strftime(DATE_FORMAT).fillna(_night(night)).tolist()
+    if column not in df.columns:
+        return [None] * len(df)
+    if column in TIME_COLUMNS and not pd.api.types.is_numeric_dtype(df[column]):
+        # "HH:MM" entries from the manual form are stored as decimal hours like the CSV schema
+        minutes = to_minutes(df[column])
+        return np.where(minutes == MISSING_MINUTES, np.nan, minutes / 60).tolist()
+    if COLUMNS[column].startswith(('INTEGER', 'REAL')):
+        # SQLite stores NaN as NULL and whole floats in INTEGER columns as integers
+        return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan).tolist()
+    values = df[column].astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def _records(df, night):
+    """Rows of ``df`` as tuples in ``COLUMNS`` order, with clock times as decimal hours
+
+    Rows without a Date are stored under ``night``.
+    """
+    return list(zip(*(_column_values(df, column, night) for column in COLUMNS)))
+
+
+def _select(student_ids=None, start=None, end=None, gender=None, university_year=None, limit=None):
+    """SQL and parameters selecting the nights that match every given filter"""
+    clauses, params = [], []
+    for column, wanted in (('student_id', student_ids), ('gender', gender), ('university_year', university_year)):
+        if wanted is None:
+            continue
+        wanted = [wanted] if isinstance(wanted, str) or not np.iterable(wanted) else list(wanted)
+        clauses.append(f"{column} IN ({', '.join('?' for _ in wanted)})")
+        params.extend(value.item() if isinstance(value, np.generic) else value for value in wanted)
+    if start is not None:
+        clauses.append('night >= ?')
+        params.append(_night(start))
+    if end is not None:
+        clauses.append('night <= ?')
+        params.append(_night(end))
+
+    sql = f"SELECT {', '.join(map(_sql_name, COLUMNS))} FROM nights"
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY student_id, night'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(int(limit))
+    return sql, params
+
+
+class SleepStore:
+    """Persistent SQLite table of nightly sleep records
+
+    Writes are keyed on ``(student_id, night)``: by default a write replaces
+    the stored record for the same student and night, and with
+    ``replace=False`` it keeps the stored one. Queries filter on the
+    indexed key, night and cohort columns and return frames in the compact
+    dashboard schema.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM nights').fetchone()[0]
+
+    def insert(self, df, night=None, replace=True):
+        """Write the rows of ``df`` and return how many were written
+
+        Rows without a Date are stored under ``night`` (default today). A row
+        whose student and night are already stored replaces that record, or
+        is skipped when ``replace`` is False.
+        """
+        if 'Student_ID' not in df.columns:
+            raise ValueError("Sleep records need a Student_ID column")
+        night = night or pd.Timestamp.today()
+        records = _records(df, night)
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        conflict = 'REPLACE' if replace else 'IGNORE'
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR {conflict} INTO nights ({', '.join(map(_sql_name, COLUMNS))}) VALUES ({placeholders})",
+                records
+            )
+            return self._conn.total_changes - before
+
+    def import_csv(self, source, night=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Bulk import a CSV in the student_sleep_patterns.csv schema, chunk by chunk"""
+        rows = sum(self.insert(chunk, night=night) for chunk in load_sleep_csv(source, chunksize=chunk_rows))
+        # Refresh the planner statistics so range and cohort queries pick their indexes
+        with self._lock:
+            self._conn.execute('PRAGMA optimize')
+        return rows
+
+    def query(self, student_ids=None, start=None, end=None, gender=None, university_year=None, limit=None):
+        """Nights matching every given filter, ordered by student and night
+
+        ``start`` and ``end`` bound the night inclusively; ``student_ids``,
+        ``gender`` and ``university_year`` take a value or a list of values.
+        """
+        sql, params = _select(student_ids, start, end, gender, university_year, limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        df = pd.DataFrame.from_records(rows, columns=list(COLUMNS))
+        df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+        return apply_schema(df)
+
+    def explain(self, **filters):
+        """SQLite's query plan for ``query(**filters)``, to check which index a slice uses"""
+        sql, params = _select(**filters)
+        with self._lock:
+            return [row[-1] for row in self._conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+    def students(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT DISTINCT student_id FROM nights ORDER BY student_id')]
+
+    def levels(self, column):
+        """Distinct values of a cohort column (``Gender`` or ``University_Year``)"""
+        if column not in ('Gender', 'University_Year'):
+            raise ValueError(f"Unknown cohort column: {column}")
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                f'SELECT DISTINCT {_sql_name(column)} FROM nights WHERE {_sql_name(column)} IS NOT NULL ORDER BY 1'
+            )]
+
+    def night_range(self):
+        """First and last stored night as Timestamps, or ``(None, None)`` when empty"""
+        with self._lock:
+            first, last = self._conn.execute('SELECT MIN(night), MAX(night) FROM nights').fetchone()
+        return (pd.Timestamp(first), pd.Timestamp(last)) if first else (None, None)
+
+    def delete(self, student_ids=None):
+        """Delete the given students' nights, or every night when no students are given"""
+        with self._lock, self._conn:
+            if student_ids is None:
+                self._conn.execute('DELETE FROM nights')
+            else:
+                self._conn.executemany('DELETE FROM nights WHERE student_id = ?', [(int(s),) for s in student_ids])
+
+    def stats(self):
+        first, last = self.night_range()
+        return {
+            'path': str(self.path),
+            'nights': len(self),
+            'students': len(self.students()),
+            'first_night': first.strftime(DATE_FORMAT) if first is not None else None,
+            'last_night': last.strftime(DATE_FORMAT) if last is not None else None
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='sleep_store', description="Manage the local sleep record store")
+    parser.add_argument('--path', default=DEFAULT_STORE_PATH, help="Store database file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    importer = commands.add_parser('import', help="Bulk import sleep CSV files")
+    importer.add_argument('inputs', nargs='+', help="CSV files in the student_sleep_patterns.csv schema")
+    importer.add_argument('--night', help="Night (YYYY-MM-DD) for rows without a Date column (default: today)")
+    query = commands.add_parser('query', help="Export a slice of the stored nights")
+    query.add_argument('--student', type=int, action='append', help="Student_ID to include (repeatable)")
+    query.add_argument('--start', help="First night, inclusive")
+    query.add_argument('--end', help="Last night, inclusive")
+    query.add_argument('--gender', action='append', help="Gender to include (repeatable)")
+    query.add_argument('--year', action='append', help="University_Year to include (repeatable)")
+    query.add_argument('-o', '--output', help="CSV file to write (default: stdout)")
+    commands.add_parser('stats', help="Show the number of stored nights and students")
+    args = parser.parse_args(argv)
+
+    store = SleepStore(args.path)
+    if args.command == 'import':
+        for source in args.inputs:
+            print(f"{source}: {store.import_csv(source, night=args.night):,} rows")
+    elif args.command == 'query':
+        df = store.query(student_ids=args.student, start=args.start, end=args.end,
+                         gender=args.gender, university_year=args.year)
+        df.to_csv(args.output or sys.stdout, index=False, date_format=DATE_FORMAT)
+    else:
+        json.dump(store.stats(), sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_DAY = 1440
+# Sentinel for missing or unparseable times in int16 minute arrays
+MISSING_MINUTES = -1
+
+# Schedule name -> (sleep start column, sleep end column)
+SCHEDULE_COLUMNS = {
+    'Weekday': ('Weekday_Sleep_Start', 'Weekday_Sleep_End'),
+    'Weekend': ('Weekend_Sleep_Start', 'Weekend_Sleep_End')
+}
+
+TIMING_FEATURES = [
+    'Weekday_Midpoint', 'Weekend_Midpoint',
+    'Weekday_Time_In_Bed', 'Weekend_Time_In_Bed',
+    'Weekday_Wraps_Midnight', 'Weekend_Wraps_Midnight',
+    'Social_Jetlag'
+]
+
+
+def to_minutes(values):
+    """Normalize clock times to int16 minutes since midnight
+
+    Accepts decimal hours (``14.16``), "HH:MM" or "HH:MM:SS" strings, or any
+    mix of them, and converts the whole column at once. Missing or
+    unparseable entries become ``MISSING_MINUTES``.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        hours = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        text = series.astype('string').str.strip()
+        hours = pd.to_numeric(text, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        clock = text.str.extract(r'^(\d{1,2}):(\d{2})(?::\d{2})?$')
+        clock_hours = (pd.to_numeric(clock[0], errors='coerce')
+                       + pd.to_numeric(clock[1], errors='coerce') / 60).to_numpy(dtype=np.float64, na_value=np.nan)
+        hours = np.where(np.isnan(hours), clock_hours, hours)
+
+    valid = np.isfinite(hours) & (hours >= 0) & (hours <= 24)
+    minutes = np.full(len(hours), MISSING_MINUTES, dtype=np.int16)
+    minutes[valid] = np.rint(hours[valid] * 60).astype(np.int16) % MINUTES_PER_DAY
+    return minutes
+
+
+def schedule_features(start, end):
+    """Midpoint, time in bed and midnight wrap-around for int16 start/end minute arrays
+
+    Returns ``(midpoint, time_in_bed, wraps_midnight, valid)``; the numeric
+    arrays hold ``MISSING_MINUTES`` wherever either time is missing.
+    """
+    valid = (start != MISSING_MINUTES) & (end != MISSING_MINUTES)
+    start32, end32 = start.astype(np.int32), end.astype(np.int32)
+    time_in_bed = (end32 - start32) % MINUTES_PER_DAY
+    midpoint = (start32 + time_in_bed // 2) % MINUTES_PER_DAY
+    wraps_midnight = valid & (end32 < start32)
+    return (
+        np.where(valid, midpoint, MISSING_MINUTES).astype(np.int16),
+        np.where(valid, time_in_bed, MISSING_MINUTES).astype(np.int16),
+        wraps_midnight,
+        valid
+    )
+
+
+def circular_difference(a, b):
+    """Shortest distance in minutes between two clock times, across midnight"""
+    difference = np.abs(a.astype(np.int32) - b.astype(np.int32)) % MINUTES_PER_DAY
+    return np.minimum(difference, MINUTES_PER_DAY - difference).astype(np.int16)
+
+
+def _nullable(minutes, valid):
+    return pd.arrays.IntegerArray(np.where(valid, minutes, 0).astype(np.int16), ~valid)
+
+
+def timing_features(df):
+    """Derive sleep midpoints, time in bed, wrap-around and social jetlag for every row
+
+    Returns a DataFrame aligned with ``df`` with minute columns as nullable
+    Int16, or an empty frame when the timing columns are absent.
+    """
+    if not all(column in df.columns for columns in SCHEDULE_COLUMNS.values() for column in columns):
+        return pd.DataFrame(index=df.index)
+
+    features = {}
+    midpoints = {}
+    for schedule, (start_column, end_column) in SCHEDULE_COLUMNS.items():
+        midpoint, time_in_bed, wraps, valid = schedule_features(
+            to_minutes(df[start_column]), to_minutes(df[end_column])
+        )
+        midpoints[schedule] = (midpoint, valid)
+        features[f'{schedule}_Midpoint'] = _nullable(midpoint, valid)
+        features[f'{schedule}_Time_In_Bed'] = _nullable(time_in_bed, valid)
+        features[f'{schedule}_Wraps_Midnight'] = wraps
+
+    (weekday, weekday_valid), (weekend, weekend_valid) = midpoints['Weekday'], midpoints['Weekend']
+    features['Social_Jetlag'] = _nullable(circular_difference(weekend, weekday), weekday_valid & weekend_valid)
+    return pd.DataFrame(features, index=df.index)[TIMING_FEATURES]
+
+
+def add_timing_features(df):
+    """Add the derived timing feature columns to ``df`` in place"""
+    features = timing_features(df)
+    for column in features.columns:
+        df[column] = features[column]
+    return df
@@ -1,5 +1,99 @@
+import os
+import re
+from functools import lru_cache
+
 import streamlit as st
 
-def load_css(file_name):
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = CSS_COMMENT.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    css = CSS_PUNCTUATION.sub(r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+@lru_cache(maxsize=8)
+def _minified_stylesheet(file_name, mtime):
     with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
\ No newline at end of file
+        return f'<style>{minify_css(f.read())}</style>'
+
+
+def load_css(file_name):
+    # Read and minified once per process; the mtime in the key picks up edits
+    st.markdown(_minified_stylesheet(file_name, os.path.getmtime(file_name)), unsafe_allow_html=True)
+
+
+@lru_cache(maxsize=256)
+def compact_html(markup):
+    """Collapse the source indentation of an inline HTML block into a single line"""
+    return re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', markup)).strip()
+
+
+def render_html(markup):
+    st.markdown(compact_html(markup), unsafe_allow_html=True)
+
+
+@lru_cache(maxsize=64)
+def section_card(icon, title, description=None, margin='0 0 1.5rem 0'):
+    """Dark card with a gradient top bar and an icon heading, used to introduce form sections"""
+    paragraph = (
+        f'<p style="color: #E5E7EB; font-size: 1rem; line-height: 1.5; margin-bottom: 0;">{description}</p>'
+        if description else ''
+    )
+    return compact_html(f"""
+    <div style="background: linear-gradient(135deg, rgba(15, 28, 46, 0.95), rgba(30, 42, 58, 0.95));
+                border: 1px solid rgba(75, 156, 211, 0.4); border-radius: 20px; padding: 2rem;
+                margin: {margin}; backdrop-filter: blur(20px); box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
+                position: relative; overflow: hidden;">
+        <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px;
+                    background: linear-gradient(90deg, #4B9CD3, #60A5FA, #93C5FD);"></div>
+        <h3 style="color: #4B9CD3; margin-bottom: {'1rem' if description else '1.5rem'}; font-size: 1.4rem;
+                   display: flex; align-items: center; gap: 0.5rem;">
+            <span style="font-size: 1.2rem;">{icon}</span> {title}
+        </h3>
+        {paragraph}
+    </div>
+    """)
+
+
+@lru_cache(maxsize=64)
+def alert_card(icon, title, messages, tags=()):
+    """Red error card with an icon badge, one paragraph per message and optional tag chips"""
+    paragraphs = ''.join(
+        f'<p style="margin: {"0" if index == 0 else "0.5rem 0 0 0"}; color: #E5E7EB; line-height: 1.6; '
+        f'font-size: 1rem;">{message}</p>'
+        for index, message in enumerate(messages)
+    )
+    chips = ''.join(
+        f'<span style="background: rgba(239, 68, 68, 0.2); border-radius: 8px; padding: 0.3rem 0.8rem; '
+        f'font-size: 0.9rem; color: #E5E7EB;">{tag}</span>'
+        for tag in tags
+    )
+    return compact_html(f"""
+    <div style="background: linear-gradient(135deg, rgba(239, 68, 68, 0.15), rgba(220, 38, 38, 0.1));
+                border: 1px solid rgba(239, 68, 68, 0.4); border-radius: 16px; padding: 2rem;
+                margin-bottom: 2rem; backdrop-filter: blur(20px); box-shadow: 0 8px 32px rgba(0, 0, 0, 0.2);
+                position: relative; overflow: hidden;">
+        <div style="position: absolute; top: 0; left: 0; right: 0; height: 3px;
+                    background: linear-gradient(90deg, #EF4444, #F87171, #FCA5A5);"></div>
+        <div style="display: flex; align-items: center; gap: 16px;">
+            <div style="background: linear-gradient(135deg, #EF4444, #F87171); border-radius: 50%;
+                        width: 60px; height: 60px; display: flex; align-items: center; justify-content: center;
+                        box-shadow: 0 4px 16px rgba(239, 68, 68, 0.3);">
+                <span style="font-size: 1.8rem;">{icon}</span>
+            </div>
+            <div style="flex: 1;">
+                <strong style="color: #EF4444; font-size: 1.2rem; display: block; margin-bottom: 0.5rem;">
+                    {title}
+                </strong>
+                {paragraphs}
+                <div style="margin-top: 1rem; display: flex; gap: 0.5rem; flex-wrap: wrap;">{chips}</div>
+            </div>
+        </div>
+    </div>
+    """)
@@ -0,0 +1,144 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+GENDERS = ['Male', 'Female', 'Other']
+UNIVERSITY_YEARS = ['1st Year', '2nd Year', '3rd Year', '4th Year']
+
+# Column order of student_sleep_patterns.csv, followed by the night of each record
+COLUMNS = [
+    'Student_ID', 'Age', 'Gender', 'University_Year', 'Sleep_Duration', 'Study_Hours',
+    'Screen_Time', 'Caffeine_Intake', 'Physical_Activity', 'Sleep_Quality',
+    'Weekday_Sleep_Start', 'Weekend_Sleep_Start', 'Weekday_Sleep_End', 'Weekend_Sleep_End', 'Date'
+]
+# Nights are spread over this many days up to the end date; the end date is fixed so seeded cohorts are reproducible
+DEFAULT_DAYS = 365
+DEFAULT_END_DATE = '2026-10-01'
+
+
+def generate_cohort(n_rows, seed=None, start_id=1, rng=None, end_date=DEFAULT_END_DATE, days=DEFAULT_DAYS):
+    """Generate a synthetic cohort in the student_sleep_patterns.csv schema
+
+    Every column is drawn with vectorized NumPy calls. Lifestyle factors
+    drive sleep: study hours, screen time and caffeine shorten sleep and push
+    bedtimes later, activity improves quality, and weekends run later than
+    weekdays. These effects are made up to give load tests and charts some
+    structure; they are not fitted to student_sleep_patterns.csv, whose
+    columns are nearly uncorrelated. Each record is dated on one of the
+    ``days`` nights ending at ``end_date``, with longer sleep on Friday and
+    Saturday nights and a slow seasonal drift.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    end_date = pd.Timestamp(end_date).normalize()
+    night = end_date.to_datetime64().astype('datetime64[D]') - rng.integers(0, days, n_rows)
+    weekend_night = np.isin((night.astype(np.int64) + 3) % 7, (4, 5))
+    season = 0.3 * np.cos(2 * np.pi * (night.astype(np.int64) % 365) / 365)
+
+    age = rng.integers(18, 26, n_rows)
+    year_index = np.clip((age - 18) // 2 + rng.integers(-1, 2, n_rows), 0, len(UNIVERSITY_YEARS) - 1)
+    gender_index = rng.choice(len(GENDERS), n_rows, p=[0.48, 0.48, 0.04])
+
+    study = np.clip(rng.normal(5.5, 2.5, n_rows) + 0.3 * year_index, 0.5, 12)
+    screen = np.clip(rng.normal(3.0, 1.2, n_rows) + 0.1 * (12 - study), 0.5, 10)
+    caffeine = np.clip(rng.poisson(1.2 + 0.15 * study), 0, 5)
+    activity = np.clip(rng.normal(60, 30, n_rows), 0, 120)
+
+    duration = np.clip(
+        8.6 - 0.15 * study - 0.25 * screen - 0.1 * caffeine + 0.004 * activity + 0.5 * weekend_night + season
+        + rng.normal(0, 0.8, n_rows),
+        4, 10
+    )
+    quality = np.clip(
+        np.rint(1 + 1.2 * (duration - 4) + 0.015 * activity - 0.3 * caffeine + rng.normal(0, 1.5, n_rows)),
+        1, 10
+    )
+
+    weekday_start = 22.5 + 0.2 * screen + 0.15 * caffeine + rng.normal(0, 0.8, n_rows)
+    weekend_start = weekday_start + np.abs(rng.normal(1.0, 0.7, n_rows))
+    weekday_end = weekday_start + duration + np.abs(rng.normal(0.3, 0.2, n_rows))
+    weekend_end = weekend_start + duration + np.abs(rng.normal(1.0, 0.6, n_rows))
+
+    return pd.DataFrame({
+        'Student_ID': np.arange(start_id, start_id + n_rows, dtype=np.int64),
+        'Age': age.astype(np.int8),
+        'Gender': pd.Categorical.from_codes(gender_index, GENDERS),
+        'University_Year': pd.Categorical.from_codes(year_index, UNIVERSITY_YEARS),
+        'Sleep_Duration': duration.round(1).astype(np.float32),
+        'Study_Hours': study.round(1).astype(np.float32),
+        'Screen_Time': screen.round(1).astype(np.float32),
+        'Caffeine_Intake': caffeine.astype(np.int8),
+        'Physical_Activity': np.rint(activity).astype(np.int16),
+        'Sleep_Quality': quality.astype(np.int8),
+        'Weekday_Sleep_Start': (weekday_start % 24).round(2).astype(np.float32),
+        'Weekend_Sleep_Start': (weekend_start % 24).round(2).astype(np.float32),
+        'Weekday_Sleep_End': (weekday_end % 24).round(2).astype(np.float32),
+        'Weekend_Sleep_End': (weekend_end % 24).round(2).astype(np.float32),
+        'Date': night.astype('datetime64[ns]')
+    }, columns=COLUMNS)
+
+
+def iter_cohort(n_rows, chunk_rows=1_000_000, seed=None, end_date=DEFAULT_END_DATE):
+    """Yield the cohort in DataFrame chunks of at most ``chunk_rows`` rows"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_rows):
+        yield generate_cohort(min(chunk_rows, n_rows - start), start_id=start + 1, rng=rng, end_date=end_date)
+
+
+def write_cohort(path, n_rows, chunk_rows=1_000_000, seed=None, fmt=None, end_date=DEFAULT_END_DATE):
+    """Write a synthetic cohort to CSV or Parquet chunk by chunk
+
+    The format is taken from the file suffix unless ``fmt`` is given.
+    Returns the row count, elapsed seconds and throughput in rows/sec.
+    """
+    path = Path(path)
+    fmt = fmt or ('parquet' if path.suffix in ('.parquet', '.pq') else 'csv')
+    start = time.perf_counter()
+
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in iter_cohort(n_rows, chunk_rows, seed, end_date):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif fmt == 'csv':
+        with open(path, 'w', newline='') as f:
+            for index, chunk in enumerate(iter_cohort(n_rows, chunk_rows, seed, end_date)):
+                chunk.to_csv(f, header=index == 0, index=False)
+    else:
+        raise ValueError(f"Unsupported output format: {fmt}")
+
+    elapsed = time.perf_counter() - start
+    return {'rows': n_rows, 'seconds': elapsed, 'rows_per_sec': n_rows / elapsed if elapsed else float('inf')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='synthetic', description="Generate a synthetic student sleep cohort")
+    parser.add_argument('rows', type=int, help="Number of rows to generate")
+    parser.add_argument('output', help="Output file (.csv or .parquet)")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for a reproducible cohort")
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000, help="Rows generated per chunk")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help="Override the output format")
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE,
+                        help=f"Last night of the cohort, YYYY-MM-DD (default: {DEFAULT_END_DATE})")
+    args = parser.parse_args(argv)
+
+    result = write_cohort(args.output, args.rows, chunk_rows=args.chunk_rows, seed=args.seed, fmt=args.format,
+                          end_date=args.end_date)
+    print(f"Wrote {result['rows']:,} rows to {args.output} in {result['seconds']:.2f}s "
+          f"({result['rows_per_sec']:,.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
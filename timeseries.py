@@ -0,0 +1,110 @@
+"""Date-indexed resampling of nightly sleep records
+
+Rows are placed on a ``DatetimeIndex`` built from the Date column and
+aggregated per day, week or month with vectorized ``resample`` calls, so
+everything downstream (charts, trends, rolling statistics) scales with the
+number of periods in the time range rather than with the number of rows.
+"""
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = 'Date'
+# Frequency code -> (pandas resample rule, label); periods are labelled by their first day
+FREQUENCIES = {
+    'D': ('D', 'Daily'),
+    'W': ('W-MON', 'Weekly'),
+    'M': ('MS', 'Monthly')
+}
+# Rolling window, in periods, for each frequency
+ROLLING_WINDOWS = {'D': 7, 'W': 4, 'M': 3}
+
+
+def has_dates(df, column=DATE_COLUMN):
+    return column in df.columns and bool(df[column].notna().any())
+
+
+def to_dates(values):
+    """Parse a column of dates to ``datetime64[ns]`` at day resolution; unparseable entries become NaT"""
+    dates = pd.to_datetime(values, errors='coerce')
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.dt.normalize().astype('datetime64[ns]')
+
+
+def time_indexed(df, column=DATE_COLUMN):
+    """``df`` indexed and sorted by its date column, without rows that have no date"""
+    dates = to_dates(df[column])
+    valid = dates.notna().to_numpy()
+    indexed = df.loc[valid].set_axis(pd.DatetimeIndex(dates[valid], name=column), axis=0)
+    return indexed.sort_index(kind='stable')
+
+
+def choose_frequency(first, last, max_periods):
+    """Finest of daily, weekly or monthly that keeps the range within ``max_periods`` periods"""
+    days = (pd.Timestamp(last) - pd.Timestamp(first)).days + 1
+    if days <= max_periods:
+        return 'D'
+    if days / 7 <= max_periods:
+        return 'W'
+    return 'M'
+
+
+def period_start(dates, freq):
+    """First day of the period containing each date"""
+    dates = pd.DatetimeIndex(dates).normalize()
+    if freq == 'D':
+        return dates
+    if freq == 'W':
+        return dates - pd.to_timedelta(dates.weekday, unit='D')
+    return dates.to_period('M').to_timestamp()
+
+
+def resample_metrics(df, freq='D', columns=('Sleep_Duration',), by=None, groups=None):
+    """Per-period count, mean and standard deviation of ``columns``
+
+    ``df`` must be date-indexed (see ``time_indexed``). Returns one row per
+    period, or per period and ``by`` group, with ``Date`` and ``nights``
+    columns plus ``<column>`` means and ``<column>_std`` spreads. Periods
+    without nights inside the range are kept with a count of zero so the
+    series stays regular; ``groups`` lists ``by`` levels to include even
+    when they have no nights at all.
+    """
+    rule = FREQUENCIES[freq][0]
+    values = df[list(columns)].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+    if by is not None:
+        values[by] = df[by].astype('string').fillna('Unknown').to_numpy()
+        grouped = values.groupby([by, pd.Grouper(freq=rule, label='left', closed='left')], sort=True)
+    else:
+        grouped = values.resample(rule, label='left', closed='left')
+
+    means = grouped.mean()
+    stds = grouped.std().add_suffix('_std')
+    counts = grouped.size().rename('nights')
+    out = pd.concat([counts, means, stds], axis=1).reset_index()
+    if by is not None:
+        # Fill each group onto the full period grid so every series shares the same x values
+        periods = pd.date_range(out[DATE_COLUMN].min(), out[DATE_COLUMN].max(), freq=rule)
+        levels = list(dict.fromkeys([*(groups or []), *out[by]]))
+        grid = pd.MultiIndex.from_product([levels, periods], names=[by, DATE_COLUMN])
+        out = out.set_index([by, DATE_COLUMN]).reindex(grid).reset_index()
+    out['nights'] = out['nights'].fillna(0).astype(np.int64)
+    return out
+
+
+def rolling_stats(series, window):
+    """Rolling mean and standard deviation over the last ``window`` periods, ignoring empty periods"""
+    rolling = series.rolling(window, min_periods=1)
+    return pd.DataFrame({'rolling_mean': rolling.mean(), 'rolling_std': rolling.std()})
+
+
+def trend(df, freq=None, column='Sleep_Duration', max_periods=5_000, window=None):
+    """Resampled means of ``column`` with a rolling mean and standard deviation
+
+    ``df`` must be date-indexed. The frequency defaults to the finest one
+    that fits ``max_periods``; the window defaults to ``ROLLING_WINDOWS``.
+    Returns ``(frequency, frame)``.
+    """
+    freq = freq or choose_frequency(df.index.min(), df.index.max(), max_periods)
+    series = resample_metrics(df, freq, columns=(column,))
+    series = pd.concat([series, rolling_stats(series[column], window or ROLLING_WINDOWS[freq])], axis=1)
+    return freq, series